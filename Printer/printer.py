@@ -132,7 +132,53 @@ def send_to_kds(order_number, items, staff_name=None, datetime_str=None):
         logging.error(f"Failed to send to KDS at {printer_config.KDS_IP}: {e}")
         raise
 
-def print_receipt(order_number, items, subtotal, tax, total, payment_method=None, card_fee=0.00, amount_tendered=None, change=None, datetime_str=None):
+def print_receipt(order_id, amount_tendered=None, change=None):
+    """Load an order and print its receipt (runs on the print worker, not the request)"""
+    # Imported here so the printer helpers stay usable without the database layer
+    from models.base import SessionLocal
+    from models.order import Order, order_load_options
+    
+    db = SessionLocal()
+    try:
+        order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
+        if not order:
+            logging.error(f"Cannot print receipt, order {order_id} not found")
+            return
+        
+        send_receipt_to_printer(
+            order.order_number,
+            [item.to_dict() for item in order.items],
+            order.subtotal,
+            order.tax,
+            order.total,
+            order.payment_method,
+            order.card_fee,
+            amount_tendered,
+            change
+        )
+    finally:
+        db.close()
+
+def print_pending_receipt(pending_id):
+    """Print a persisted pending receipt and clear it once the printer accepts it"""
+    from models.base import SessionLocal
+    from models.system import PendingReceipt
+    
+    db = SessionLocal()
+    try:
+        pending = db.get(PendingReceipt, pending_id)
+        if not pending:
+            return
+        
+        # Raises on printer failure, leaving the row to be retried on next startup
+        print_receipt(pending.order_id, pending.amount_tendered, pending.change)
+        
+        db.delete(pending)
+        db.commit()
+    finally:
+        db.close()
+
+def send_receipt_to_printer(order_number, items, subtotal, tax, total, payment_method=None, card_fee=0.00, amount_tendered=None, change=None, datetime_str=None):
     """Print a detailed receipt to the physical printer"""
     try:
         # Reload printer_config to get latest settings
@@ -200,7 +246,7 @@ def print_receipt(order_number, items, subtotal, tax, total, payment_method=None
             ])
 
             # Add card fee if applicable
-            if payment_method == PaymentMethod.CARD and card_fee > 0:
+            if payment_method == "card" and card_fee > 0:
                 receipt_lines.append(f"Card Fee: ${card_fee:.2f}\n".encode())
 
             # Add final total
@@ -7,12 +7,13 @@ from contextlib import asynccontextmanager
 import uvicorn
 import logging
 from datetime import datetime
-from config import HOST, PORT, SQUARE_ACCESS_TOKEN
+from config import HOST, PORT, SQUARE_ACCESS_TOKEN, SQUARE_ENVIRONMENT
 from models import get_db, Base
-from models.base import engine
+from models.base import engine, SessionLocal
 from routes import auth, catalog, order, payment, websocket, admin, staff, staff_time, discount
-from utils.square import check_connection
+from utils.square import check_connection, close_client as close_square_client
 from utils.websocket import manager
+from utils.print_queue import print_queue
 import os
 from zeroconf import ServiceInfo, Zeroconf
 import socket
@@ -147,17 +148,27 @@ async def lifespan(app: FastAPI):
         logger.warning("Square access token not configured")
     else:
         try:
-            status = check_connection()
-            if status["status"] == "connected":
-                logger.info(f"Connected to Square API ({status['environment']})")
+            if await check_connection():
+                logger.info(f"Connected to Square API ({SQUARE_ENVIRONMENT})")
             else:
-                logger.error(f"Failed to connect to Square API: {status.get('error')}")
+                logger.error("Failed to connect to Square API")
         except Exception as e:
             logger.error(f"Error checking Square connection: {e}")
     
     # Initialize WebSocket manager
     logger.info("WebSocket manager initialized")
     
+    # Start printer/KDS dispatch worker and pick up receipts left from the last run
+    print_queue.start()
+    try:
+        db = SessionLocal()
+        try:
+            print_queue.requeue_pending_receipts(db)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Failed to requeue pending receipts: {e}")
+    
     yield
     
     # Shutdown
@@ -172,6 +183,12 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error unregistering zeroconf service: {e}")
     
+    # Stop printer/KDS dispatch worker
+    await print_queue.stop()
+    
+    # Close the pooled Square HTTP client
+    await close_square_client()
+    
     # Close all WebSocket connections
     for client_type in manager.connections:
         for client_id in list(manager.connections[client_type].keys()):
@@ -446,7 +463,7 @@ app = FastAPI(
 )
 
 # Mount static files directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", StaticFiles(directory="static", check_dir=False), name="static")
 
 # Configure CORS
 app.add_middleware(
@@ -38,6 +38,10 @@ TOKEN_EXPIRE_MINUTES = int(os.getenv("TOKEN_EXPIRE_MINUTES", 60 * 24))  # 24 hou
 
 # Database
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", min((os.cpu_count() or 1) * 4, 40)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", DB_POOL_SIZE * 2))
+# Orders archived per batch; also keeps each IN (...) list under SQLite's parameter limit
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,32 @@
+"""add unique index on active order numbers
+
+Revision ID: 20261015_add_active_order_number_unique
+Revises: 20261015_add_order_created_number_index
+Create Date: 2026-10-15 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_active_order_number_unique'
+down_revision = '20261015_add_order_created_number_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial unique index: an order number is only reserved while the order is active
+    op.create_index(
+        'ux_order_active_number',
+        'orders',
+        ['order_number'],
+        unique=True,
+        sqlite_where=sa.text("status IN ('PREP', 'READY')"),
+        postgresql_where=sa.text("status IN ('PREP', 'READY')")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_order_active_number', table_name='orders')
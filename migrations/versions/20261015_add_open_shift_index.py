@@ -0,0 +1,31 @@
+"""add open shift index
+
+Revision ID: 20261015_add_open_shift_index
+Revises: 20261015_add_order_status_created_index
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_open_shift_index'
+down_revision = '20261015_add_order_status_created_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial index over open shifts only (staff.pin is already covered by its unique constraint)
+    op.create_index(
+        'ix_shift_staff_open',
+        'staff_shifts',
+        ['staff_id'],
+        sqlite_where=sa.text('clock_out IS NULL'),
+        postgresql_where=sa.text('clock_out IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shift_staff_open', table_name='staff_shifts')
@@ -0,0 +1,29 @@
+"""add order created_at/order_number index
+
+Revision ID: 20261015_add_order_created_number_index
+Revises: 20261015_create_receipts_pending
+Create Date: 2026-10-15 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_order_created_number_index'
+down_revision = '20261015_create_receipts_pending'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Covering index for get_next_order_number (latest order number today)
+    op.create_index(
+        'ix_orders_created_at_order_number',
+        'orders',
+        ['created_at', 'order_number']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_created_at_order_number', table_name='orders')
@@ -0,0 +1,29 @@
+"""add order status/created_at index
+
+Revision ID: 20261015_add_order_status_created_index
+Revises: 20261015_add_order_updated_at
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_order_status_created_index'
+down_revision = '20261015_add_order_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Lets the order list filter by status and walk created_at newest-first
+    op.create_index(
+        'idx_order_status_created',
+        'orders',
+        ['status', sa.text('created_at DESC')]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_order_status_created', table_name='orders')
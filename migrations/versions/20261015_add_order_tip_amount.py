@@ -0,0 +1,25 @@
+"""add order tip_amount
+
+Revision ID: 20261015_add_order_tip_amount
+Revises: 20261015_add_active_order_number_unique
+Create Date: 2026-10-15 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_order_tip_amount'
+down_revision = '20261015_add_active_order_number_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tip is part of the total, stored so recalculations keep it
+    op.add_column('orders', sa.Column('tip_amount', sa.Float(), server_default='0', nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'tip_amount')
@@ -0,0 +1,25 @@
+"""add order updated_at
+
+Revision ID: 20261015_add_order_updated_at
+Revises: 20240205_create_staff_tables
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_order_updated_at'
+down_revision = '20240205_create_staff_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Version stamp used to cache serialized orders
+    op.add_column('orders', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'updated_at')
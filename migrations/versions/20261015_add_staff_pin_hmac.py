@@ -0,0 +1,27 @@
+"""add staff pin_hmac
+
+Revision ID: 20261015_add_staff_pin_hmac
+Revises: 20261015_add_open_shift_index
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_add_staff_pin_hmac'
+down_revision = '20261015_add_open_shift_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyed PIN digest; existing rows are backfilled on their next login
+    op.add_column('staff', sa.Column('pin_hmac', sa.String(64), nullable=True))
+    op.create_index(op.f('ix_staff_pin_hmac'), 'staff', ['pin_hmac'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_staff_pin_hmac'), table_name='staff')
+    op.drop_column('staff', 'pin_hmac')
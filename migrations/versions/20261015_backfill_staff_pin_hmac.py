@@ -0,0 +1,41 @@
+"""backfill staff pin_hmac
+
+Revision ID: 20261015_backfill_staff_pin_hmac
+Revises: 20261015_add_order_tip_amount
+Create Date: 2026-10-15 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_backfill_staff_pin_hmac'
+down_revision = '20261015_add_order_tip_amount'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Digest plain-text PINs so logins never scan them; bcrypt-hashed PINs
+    # cannot be digested here and are backfilled on their next login
+    from utils.auth import get_pin_hmac
+    
+    staff = sa.table(
+        'staff',
+        sa.column('id', sa.Integer),
+        sa.column('pin', sa.String),
+        sa.column('pin_hmac', sa.String)
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(staff.c.id, staff.c.pin).where(staff.c.pin_hmac.is_(None))).all()
+    for staff_id, pin in rows:
+        if pin and len(pin) == 4 and pin.isascii() and pin.isdecimal():
+            conn.execute(
+                staff.update().where(staff.c.id == staff_id).values(pin_hmac=get_pin_hmac(pin))
+            )
+
+
+def downgrade() -> None:
+    # The digests stay valid; the column itself is dropped by add_staff_pin_hmac
+    pass
@@ -0,0 +1,33 @@
+"""create receipts_pending
+
+Revision ID: 20261015_create_receipts_pending
+Revises: 20261015_add_staff_pin_hmac
+Create Date: 2026-10-15 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261015_create_receipts_pending'
+down_revision = '20261015_add_staff_pin_hmac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Receipts queued for printing, kept until the printer accepts them
+    op.create_table('receipts_pending',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('amount_tendered', sa.Float(), nullable=True),
+        sa.Column('change', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('receipts_pending')
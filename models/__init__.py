@@ -1,13 +1,14 @@
-from .base import Base, get_db
+from .base import Base, get_db, get_async_db
 from .staff import Staff, StaffShift
 from .catalog import Category, Item, ModList, Mod
-from .order import Order, OrderItem, OrderStatus, PaymentMethod, OrderItemMod
+from .order import Order, OrderItem, OrderStatus, PaymentMethod, OrderItemMod, OrderHistory
 from .discount import DiscountGroup, Discount, OrderDiscount
-from .system import CardFeeSettings
+from .system import CardFeeSettings, PendingReceipt, SystemSettings
 
 __all__ = [
     'Base',
     'get_db',
+    'get_async_db',
     'Staff',
     'StaffShift',
     'Category',
@@ -17,10 +18,13 @@ __all__ = [
     'Order',
     'OrderItem',
     'OrderItemMod',
+    'OrderHistory',
     'OrderStatus',
     'PaymentMethod',
     'DiscountGroup',
     'Discount',
     'OrderDiscount',
-    'CardFeeSettings'
+    'CardFeeSettings',
+    'PendingReceipt',
+    'SystemSettings'
 ] 
\ No newline at end of file
@@ -2,9 +2,11 @@ import os
 import logging
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.exc import SQLAlchemyError
-from config import SQLALCHEMY_DATABASE_URL
+from config import SQLALCHEMY_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,12 @@ engine = create_engine(
         "check_same_thread": False,  # Needed for SQLite
         "timeout": 30  # Increase SQLite timeout
     },
+    # SQLAlchemy 1.4 defaults file databases to NullPool, which reconnects and
+    # reruns the pragmas for every session; keep a real pool instead
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,  # Sized to the CPU count by default (see config)
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=30,
     pool_pre_ping=True,  # Enable connection health checks
     pool_recycle=3600,  # Recycle connections after 1 hour
     echo=False  # Set to True for SQL query logging
@@ -33,8 +41,28 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging
     cursor.execute("PRAGMA synchronous=NORMAL")  # Faster, still safe
     cursor.execute("PRAGMA foreign_keys=ON")  # Enforce foreign key constraints
+    cursor.execute("PRAGMA temp_store=MEMORY")  # Keep temp tables/indices in memory
+    cursor.execute("PRAGMA mmap_size=268435456")  # Memory-map up to 256MB of the file
     cursor.close()
 
+# Async engine over the same database file for routes that await their queries.
+# aiosqlite runs each connection on its own thread; the pragmas are applied
+# through the underlying sync engine's connect event.
+async_engine = create_async_engine(
+    # Same URL as the sync engine with the async driver, so the two cannot drift apart
+    engine.url.set(drivername="sqlite+aiosqlite"),
+    connect_args={
+        "timeout": 30  # Increase SQLite timeout
+    },
+    # Like the sync engine, a file database would default to NullPool here
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,  # Enable connection health checks
+    echo=False  # Set to True for SQL query logging
+)
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
 # Create sessionmaker with better defaults
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -43,6 +71,13 @@ SessionLocal = sessionmaker(
     expire_on_commit=False  # Prevent detached instance errors
 )
 
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # Attribute access after commit must not trigger IO
+)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -50,11 +85,19 @@ Base = declarative_base()
 def get_db():
     db = SessionLocal()
     try:
-        # Test the connection
-        db.execute("SELECT 1")
+        # Connection liveness is checked by pool_pre_ping on checkout
         yield db
     except SQLAlchemyError as e:
         logger.error(f"Database error: {str(e)}")
         raise
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
+
+# Async counterpart of get_db
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except SQLAlchemyError as e:
+            logger.error(f"Database error: {str(e)}")
+            raise
@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Enum, JSON, Index
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import relationship, selectinload
 from sqlalchemy.sql import func
 import enum
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_EVEN
 from .base import Base
 from .system import CardFeeSettings
 
+# LRU of serialized orders keyed by (order id, updated_at)
+_ORDER_DICT_CACHE_SIZE = 4096
+_order_dict_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_order_dict_cache_lock = threading.Lock()
+
 class OrderStatus(str, enum.Enum):
     PREP = "prep"      # Order is being prepared
     READY = "ready"    # Order is ready for pickup/delivery
@@ -30,7 +39,8 @@ class Order(Base):
     subtotal = Column(Float, nullable=False)
     tax = Column(Float, nullable=False)
     card_fee = Column(Float, default=0.00)  # Only applied for card payments
-    total = Column(Float, nullable=False)    # subtotal - discount_amount + tax + card_fee
+    tip_amount = Column(Float, default=0.00)
+    total = Column(Float, nullable=False)    # subtotal - discount_amount + tax + card_fee + tip_amount
     
     payment_method = Column(Enum(PaymentMethod))
     notes = Column(String)
@@ -40,10 +50,27 @@ class Order(Base):
     square_refund_id = Column(String)
     
     # Timing tracking
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Python-side default so the value is known after flush without a reload;
+    # the server default still covers inserts made outside the ORM
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
     ready_at = Column(DateTime(timezone=True))    # Set when status = READY
     done_at = Column(DateTime(timezone=True))     # Set when status = DONE
     refunded_at = Column(DateTime(timezone=True)) # Set when refunded
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)  # Serialization cache version
+
+    __table_args__ = (
+        # Serves list_orders: status filter with newest-first ordering
+        Index('idx_order_status_created', status, created_at.desc()),
+        # Covers get_next_order_number: latest order number created today
+        Index('ix_orders_created_at_order_number', created_at, order_number),
+        # Active orders never share a number; create_order retries on conflict
+        Index(
+            'ux_order_active_number', order_number,
+            unique=True,
+            sqlite_where=text("status IN ('PREP', 'READY')"),
+            postgresql_where=text("status IN ('PREP', 'READY')")
+        ),
+    )
 
     # Relationships
     staff = relationship("Staff", back_populates="orders")
@@ -85,8 +112,11 @@ class Order(Base):
         # Calculate and add card fee if applicable
         self.calculate_card_fee(db_session)
         
-        # Set final total
-        self.total = round(base_total + self.card_fee, 2)
+        # Set final total; the tip sits on top of the card fee base
+        self.total = round(base_total + self.card_fee + (self.tip_amount or 0.0), 2)
+        
+        # Touch the version stamp; discount changes alone may not dirty the row
+        self.updated_at = datetime.utcnow()
 
     def apply_discount(self, discount, db_session):
         """Apply a discount to the order"""
@@ -114,10 +144,31 @@ class Order(Base):
     def get_square_amount(self):
         """Get amount to be charged via Square (in cents)"""
         if self.payment_method == PaymentMethod.CARD:
-            return int(self.total * 100)  # Convert to cents
+            # Convert to cents via Decimal; int(total * 100) can lose a cent to float error
+            return int((Decimal(str(self.total)) * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
         return 0
 
     def to_dict(self):
+        """Serialize the order, reusing the cached dict while updated_at is unchanged"""
+        # Unflushed changes have not bumped updated_at yet, so bypass the cache
+        if self.updated_at is None or inspect(self).modified:
+            return self._build_dict()
+        
+        key = (self.id, self.updated_at)
+        with _order_dict_cache_lock:
+            cached = _order_dict_cache.get(key)
+            if cached is not None:
+                _order_dict_cache.move_to_end(key)
+                return dict(cached)
+        
+        data = self._build_dict()
+        with _order_dict_cache_lock:
+            _order_dict_cache[key] = data
+            if len(_order_dict_cache) > _ORDER_DICT_CACHE_SIZE:
+                _order_dict_cache.popitem(last=False)
+        return dict(data)
+
+    def _build_dict(self):
         return {
             "order_id": self.id,
             "order_number": self.order_number,
@@ -127,6 +178,7 @@ class Order(Base):
             "total_discount": float(self.get_total_discount()),
             "tax": float(self.tax),
             "card_fee": float(self.card_fee),
+            "tip_amount": float(self.tip_amount or 0.0),
             "total": float(self.total),
             "payment_method": self.payment_method.value if self.payment_method else None,
             "notes": self.notes,
@@ -226,7 +278,12 @@ class OrderHistory(Base):
     @classmethod
     def from_order(cls, order: Order) -> 'OrderHistory':
         """Create OrderHistory record from an Order"""
-        return cls(
+        return cls(**cls.values_from_order(order))
+
+    @staticmethod
+    def values_from_order(order: Order) -> dict:
+        """Column values for an OrderHistory row, usable with bulk inserts"""
+        return dict(
             order_id=order.id,
             order_number=order.order_number,
             staff_id=order.staff_id,
@@ -267,4 +324,15 @@ class OrderHistory(Base):
             "archived_at": self.archived_at.isoformat() if self.archived_at else None,
             "items": self.items_data,
             "discounts": self.discounts_data
-        } 
\ No newline at end of file
+        } 
+
+def order_load_options():
+    """
+    Eager-load everything Order.to_dict() touches (items, their catalog item
+    and mods, and discounts) with one IN query per relationship.
+    """
+    return (
+        selectinload(Order.items).selectinload(OrderItem.item),
+        selectinload(Order.items).selectinload(OrderItem.mods),
+        selectinload(Order.discounts),
+    )
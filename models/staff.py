@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -9,6 +9,7 @@ class Staff(Base):
     id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     name = Column(String, nullable=False)
     pin = Column(String(4), nullable=False, unique=True)  # 4-digit PIN
+    pin_hmac = Column(String(64), unique=True, index=True)  # HMAC-SHA256 of the PIN for lookups
     hourly_rate = Column(Float, default=0.00)
     isAdmin = Column(Boolean, default=False)
     is_working = Column(Boolean, default=False)
@@ -45,6 +46,12 @@ class StaffShift(Base):
     # Validation for six-digit ID
     __table_args__ = (
         CheckConstraint('id >= 100000 AND id < 1000000', name='check_staffshift_six_digit_id'),
+        # Finds a staff member's open shift without scanning closed ones
+        Index(
+            'ix_shift_staff_open', 'staff_id',
+            sqlite_where=text('clock_out IS NULL'),
+            postgresql_where=text('clock_out IS NULL')
+        ),
         {'sqlite_autoincrement': True}  # Ensure SQLite uses true autoincrement
     )
     clock_out = Column(DateTime(timezone=True))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from .base import Base
 
@@ -35,4 +35,14 @@ class SystemSettings(Base):
             "timezone": self.timezone,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        } 
\ No newline at end of file
+        } 
+
+class PendingReceipt(Base):
+    """Receipt waiting to be printed; deleted once the printer accepts it"""
+    __tablename__ = 'receipts_pending'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    amount_tendered = Column(Float)  # Cash payments only; not stored on the order
+    change = Column(Float)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
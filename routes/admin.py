@@ -6,8 +6,8 @@ import os
 import subprocess
 from datetime import datetime
 import shutil
-from models import get_db, Staff, StaffRole, SystemSettings
-from utils.auth import get_current_staff, verify_admin, verify_admin_token
+from models import get_db, Staff, SystemSettings
+from utils.auth import get_current_staff, verify_admin
 import logging
 from sqlalchemy.orm import Session
 from models.system import CardFeeSettings
@@ -164,7 +164,7 @@ logger = logging.getLogger(__name__)
 # Helper function to check admin role
 def check_admin_role(staff: Staff = Depends(get_current_staff)):
     """Check if staff member has admin role"""
-    if staff.role != StaffRole.ADMIN:
+    if not staff.isAdmin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin role required"
@@ -564,7 +564,7 @@ async def update_card_fee_settings(
     return settings.to_dict()
 
 @router.post("/reset-order-numbers")
-def reset_orders(db: Session = Depends(get_db), _=Depends(verify_admin_token)):
+def reset_orders(db: Session = Depends(get_db), _=Depends(verify_admin)):
     """
     Manually reset order numbers.
     Requires admin authentication.
@@ -589,7 +589,7 @@ async def get_system_timezone(db: Session = Depends(get_db)):
 async def update_system_timezone(
     updates: SystemSettingsUpdate,
     db: Session = Depends(get_db),
-    _=Depends(verify_admin_token)
+    _=Depends(verify_admin)
 ):
     """Update system timezone (Admin only)"""
     try:
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field, constr, validator
 
-from models import Staff, StaffShift, StaffRole, get_db
+from models import Staff, StaffShift, get_db
 from utils.auth import (
     authenticate_staff,
     create_access_token,
     get_current_staff,
-    get_pin_hash
+    get_pin_hash_async,
+    get_pin_hmac,
+    invalidate_pin_cache
 )
 
 router = APIRouter(
@@ -22,6 +25,24 @@ router = APIRouter(
     }
 )
 
+def require_manager(current_staff: Staff = Depends(get_current_staff)) -> Staff:
+    """Verify staff member has manager or admin role"""
+    # isAdmin is the only privilege flag staff records carry
+    if not current_staff.isAdmin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Manager or admin access required"
+        )
+    return current_staff
+
+# Staff management routes, guarded once at the router level
+manager_router = APIRouter(
+    dependencies=[Depends(require_manager)],
+    responses={
+        403: {"description": "Not authorized (requires manager/admin)"},
+    }
+)
+
 # Pydantic models for request/response
 class Token(BaseModel):
     """JWT token response model"""
@@ -37,8 +58,10 @@ class Token(BaseModel):
                 "staff": {
                     "id": 1,
                     "name": "John Doe",
-                    "role": "STAFF",
-                    "active": True
+                    "isAdmin": False,
+                    "working": False,
+                    "break": False,
+                    "available": True
                 }
             }
         }
@@ -61,7 +84,7 @@ class StaffCreate(BaseModel):
     name: str = Field(..., min_length=2, description="Staff member's name")
     pin: str = Field(..., min_length=4, max_length=8, description="PIN code for login")
     hourly_rate: float = Field(..., gt=0, description="Hourly pay rate")
-    role: StaffRole = Field(..., description="Staff role (ADMIN, MANAGER, STAFF)")
+    isAdmin: bool = Field(False, description="Whether the staff member has admin access")
 
     class Config:
         json_schema_extra = {
@@ -69,44 +92,53 @@ class StaffCreate(BaseModel):
                 "name": "John Doe",
                 "pin": "1234",
                 "hourly_rate": 15.50,
-                "role": "STAFF"
+                "isAdmin": False
             }
         }
 
 class StaffUpdate(BaseModel):
     """Staff update request model"""
-    name: str | None = Field(None, min_length=2, description="Staff member's name")
-    pin: str | None = Field(None, min_length=4, max_length=8, description="PIN code for login")
-    hourly_rate: float | None = Field(None, gt=0, description="Hourly pay rate")
-    role: StaffRole | None = Field(None, description="Staff role (ADMIN, MANAGER, STAFF)")
-    active: bool | None = Field(None, description="Staff active status")
+    name: Optional[str] = Field(None, min_length=2, description="Staff member's name")
+    pin: Optional[str] = Field(None, min_length=4, max_length=8, description="PIN code for login")
+    hourly_rate: Optional[float] = Field(None, gt=0, description="Hourly pay rate")
+    isAdmin: Optional[bool] = Field(None, description="Whether the staff member has admin access")
+    available: Optional[bool] = Field(None, description="Whether the staff member can log in")
 
     class Config:
         json_schema_extra = {
             "example": {
                 "name": "John Doe",
                 "hourly_rate": 16.50,
-                "role": "MANAGER",
-                "active": True
+                "isAdmin": True,
+                "available": True
             }
         }
 
+class StaffResponse(BaseModel):
+    """Staff response model, matching Staff.to_dict()"""
+    id: int = Field(..., description="Staff member ID")
+    name: str = Field(..., description="Staff member's name")
+    isAdmin: Optional[bool] = Field(None, description="Whether the staff member has admin access")
+    working: Optional[bool] = Field(None, description="Whether the staff member is clocked in")
+    on_break: Optional[bool] = Field(None, alias="break", description="Whether the staff member is on break")
+    available: Optional[bool] = Field(None, description="Whether the staff member can log in")
+
 class LoginRequest(BaseModel):
     pin: constr(min_length=4, max_length=4)  # 4-digit PIN
 
     @validator('pin')
     def validate_pin(cls, v):
-        if not v.isdigit():
+        if not (v.isascii() and v.isdecimal()):
             raise ValueError('PIN must contain only digits')
         return v
 
 @router.post("/login")
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Login with a 4-digit PIN.
     Returns staff information and permissions if successful.
     """
-    staff = db.query(Staff).filter(Staff.pin == login_data.pin).first()
+    staff = await authenticate_staff(login_data.pin, db)
     
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
@@ -120,12 +152,12 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @router.post("/verify-admin")
-def verify_admin(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def verify_admin(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Verify if a PIN belongs to an admin staff member.
     Returns admin status if successful.
     """
-    staff = db.query(Staff).filter(Staff.pin == login_data.pin).first()
+    staff = await authenticate_staff(login_data.pin, db)
     
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
@@ -161,7 +193,7 @@ async def clock_in(
     """
     active_shift = db.query(StaffShift).filter(
         StaffShift.staff_id == current_staff.id,
-        StaffShift.clock_out == None
+        StaffShift.clock_out.is_(None)
     ).first()
     
     if active_shift:
@@ -170,10 +202,14 @@ async def clock_in(
             detail="Already clocked in"
         )
     
-    shift = StaffShift(staff_id=current_staff.id)
+    # Set clock-in client side so the committed instance is already complete
+    shift = StaffShift(
+        staff_id=current_staff.id,
+        clock_in=datetime.utcnow(),
+        hourly_rate=current_staff.hourly_rate
+    )
     db.add(shift)
     db.commit()
-    db.refresh(shift)
     
     return shift.to_dict()
 
@@ -197,7 +233,7 @@ async def clock_out(
     """
     active_shift = db.query(StaffShift).filter(
         StaffShift.staff_id == current_staff.id,
-        StaffShift.clock_out == None
+        StaffShift.clock_out.is_(None)
     ).first()
     
     if not active_shift:
@@ -208,7 +244,6 @@ async def clock_out(
     
     active_shift.clock_out = datetime.utcnow()
     db.commit()
-    db.refresh(active_shift)
     
     return active_shift.to_dict()
 
@@ -232,7 +267,7 @@ async def start_break(
     """
     active_shift = db.query(StaffShift).filter(
         StaffShift.staff_id == current_staff.id,
-        StaffShift.clock_out == None
+        StaffShift.clock_out.is_(None)
     ).first()
     
     if not active_shift:
@@ -249,7 +284,6 @@ async def start_break(
     
     active_shift.break_start = datetime.utcnow()
     db.commit()
-    db.refresh(active_shift)
     
     return active_shift.to_dict()
 
@@ -273,7 +307,7 @@ async def end_break(
     """
     active_shift = db.query(StaffShift).filter(
         StaffShift.staff_id == current_staff.id,
-        StaffShift.clock_out == None
+        StaffShift.clock_out.is_(None)
     ).first()
     
     if not active_shift or not active_shift.break_start:
@@ -290,14 +324,17 @@ async def end_break(
     
     active_shift.break_end = datetime.utcnow()
     db.commit()
-    db.refresh(active_shift)
     
     return active_shift.to_dict()
 
-@router.post("/staff", response_model=dict, status_code=status.HTTP_201_CREATED)
+@manager_router.post(
+    "/staff",
+    response_model=StaffResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_201_CREATED
+)
 async def create_staff(
     staff_data: StaffCreate,
-    current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """
@@ -310,7 +347,7 @@ async def create_staff(
     - name: Staff member's name
     - pin: Login PIN code
     - hourly_rate: Pay rate
-    - role: Staff role (ADMIN, MANAGER, STAFF)
+    - isAdmin: Admin access (optional, defaults to false)
 
     Returns:
     - Created staff member details
@@ -319,28 +356,38 @@ async def create_staff(
     - 401: Not authenticated
     - 403: Not authorized (requires manager/admin)
     """
-    if current_staff.role not in [StaffRole.MANAGER, StaffRole.ADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create staff"
-        )
-    
-    new_staff = Staff(
-        name=staff_data.name,
-        pin=get_pin_hash(staff_data.pin),
-        hourly_rate=staff_data.hourly_rate,
-        role=staff_data.role
-    )
+    values = {
+        "name": staff_data.name,
+        "pin": await get_pin_hash_async(staff_data.pin),
+        "pin_hmac": get_pin_hmac(staff_data.pin),
+        "hourly_rate": staff_data.hourly_rate,
+        "isAdmin": staff_data.isAdmin,
+        "is_working": False,
+        "is_on_break": False,
+        "available": True
+    }
     
-    db.add(new_staff)
+    # Plain Core INSERT: no transient ORM instance and no refresh SELECT
+    result = db.execute(insert(Staff).values(**values))
     db.commit()
-    db.refresh(new_staff)
+    # Core INSERTs skip the mapper events that normally invalidate the PIN cache
+    invalidate_pin_cache()
     
-    return new_staff.to_dict()
+    return {
+        "id": result.inserted_primary_key[0],
+        "name": values["name"],
+        "isAdmin": values["isAdmin"],
+        "working": values["is_working"],
+        "break": values["is_on_break"],
+        "available": values["available"]
+    }
 
-@router.get("/staff", response_model=List[dict])
+@manager_router.get(
+    "/staff",
+    response_model=List[StaffResponse],
+    response_model_exclude_none=True
+)
 async def list_staff(
-    current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """
@@ -356,20 +403,17 @@ async def list_staff(
     - 401: Not authenticated
     - 403: Not authorized (requires manager/admin)
     """
-    if current_staff.role not in [StaffRole.MANAGER, StaffRole.ADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to view staff list"
-        )
-    
     staff = db.query(Staff).all()
     return [s.to_dict() for s in staff]
 
-@router.put("/staff/{staff_id}", response_model=dict)
+@manager_router.put(
+    "/staff/{staff_id}",
+    response_model=StaffResponse,
+    response_model_exclude_none=True
+)
 async def update_staff(
     staff_id: int,
     staff_data: StaffUpdate,
-    current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """
@@ -383,8 +427,8 @@ async def update_staff(
     - name: New name (optional)
     - pin: New PIN code (optional)
     - hourly_rate: New pay rate (optional)
-    - role: New role (optional)
-    - active: New active status (optional)
+    - isAdmin: New admin access (optional)
+    - available: New availability (optional)
 
     Returns:
     - Updated staff member details
@@ -394,12 +438,6 @@ async def update_staff(
     - 403: Not authorized (requires manager/admin)
     - 404: Staff member not found
     """
-    if current_staff.role not in [StaffRole.MANAGER, StaffRole.ADMIN]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update staff"
-        )
-    
     staff = db.query(Staff).filter(Staff.id == staff_id).first()
     if not staff:
         raise HTTPException(
@@ -411,15 +449,18 @@ async def update_staff(
     if staff_data.name is not None:
         staff.name = staff_data.name
     if staff_data.pin is not None:
-        staff.pin = get_pin_hash(staff_data.pin)
+        staff.pin = await get_pin_hash_async(staff_data.pin)
+        staff.pin_hmac = get_pin_hmac(staff_data.pin)
     if staff_data.hourly_rate is not None:
         staff.hourly_rate = staff_data.hourly_rate
-    if staff_data.role is not None:
-        staff.role = staff_data.role
-    if staff_data.active is not None:
-        staff.active = staff_data.active
+    if staff_data.isAdmin is not None:
+        staff.isAdmin = staff_data.isAdmin
+    if staff_data.available is not None:
+        staff.available = staff_data.available
     
     db.commit()
-    db.refresh(staff)
     
-    return staff.to_dict()
\ No newline at end of file
+    return staff.to_dict()
+
+# Register manager-only routes after they have been declared
+router.include_router(manager_router)
@@ -4,7 +4,7 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from decimal import Decimal
 
-from models import Staff, Category, Item, ModList, Mod, StaffRole, get_db
+from models import Staff, Category, Item, ModList, Mod, get_db
 from utils.auth import get_current_staff
 
 router = APIRouter(
@@ -95,7 +95,7 @@ class ModListCreate(BaseModel):
                 "min_selections": 0,
                 "max_selections": 3,
                 "sort_order": 1,
-                "available": true,
+                "available": True,
                 "mods": [
                     {
                         "name": "Extra Cheese",
@@ -165,7 +165,7 @@ class ItemCreate(BaseModel):
                 "reg_price": 12.99,
                 "event_price": 15.99,
                 "sort_order": 1,
-                "available": true
+                "available": True
             }
         }
 
@@ -237,7 +237,8 @@ class CategoryUpdate(BaseModel):
 # Helper function to check manager/admin role
 def check_manager_role(staff: Staff):
     """Check if staff member has manager or admin role"""
-    if staff.role not in [StaffRole.MANAGER, StaffRole.ADMIN]:
+    # isAdmin is the only privilege flag staff records carry
+    if not staff.isAdmin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized. Manager or Admin role required."
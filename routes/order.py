@@ -1,27 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Annotated, List, Literal, Optional, Union
+from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
+import re
 
 from models import (
-    Staff, Order, OrderItem, Item, Discount, CardFee,
+    Staff, Order, OrderItem, OrderItemMod, Item, Discount,
     OrderStatus, PaymentMethod, get_db
 )
+from models.order import order_load_options
 from utils.auth import get_current_staff
 from utils.order_validation import (
     get_next_order_number,
-    calculate_order_totals,
+    next_free_order_number,
+    record_order_number,
     validate_order_items,
-    validate_payment
+    validate_payment,
+    get_entity_cache
 )
 from utils.websocket import manager
-from Printer.printer import send_to_physical_printer, send_to_kds, print_receipt
-from utils.order_management import validate_order_number
+from utils.print_queue import print_queue
+
+# Order numbers tried before create_order gives up
+ORDER_NUMBER_ATTEMPTS = 5
+
+# The printer stack is imported on first use, inside the print worker, so
+# workers that never print do not load it at startup
+def _send_to_physical_printer(*args):
+    from Printer.printer import send_to_physical_printer
+    return send_to_physical_printer(*args)
+
+def _send_to_kds(*args):
+    from Printer.printer import send_to_kds
+    return send_to_kds(*args)
 
 router = APIRouter(
     prefix="/orders",
     tags=["Orders"],
+    # Order payloads are the hot path; the other routers keep the default JSONResponse
+    default_response_class=ORJSONResponse,
     responses={
         401: {"description": "Not authenticated"},
         403: {"description": "Not authorized"},
@@ -30,6 +52,15 @@ router = APIRouter(
     }
 )
 
+# Strict YYYY-MM-DD guard for the list filter (fromisoformat alone accepts more)
+_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# Allowed status transitions (VOID is the cancelled state)
+_VALID_TRANSITIONS = {
+    OrderStatus.PREP: frozenset({OrderStatus.READY, OrderStatus.VOID}),
+    OrderStatus.READY: frozenset({OrderStatus.DONE}),
+}
+
 # Pydantic models
 class ModifierData(BaseModel):
     """Modifier selection data"""
@@ -107,67 +138,153 @@ class OrderUpdate(BaseModel):
             }
         }
 
-class PaymentData(BaseModel):
-    """Payment data model"""
-    payment_method: PaymentMethod = Field(..., description="Payment method (CASH/CARD)")
-    cash_tendered: Optional[float] = Field(
-        None,
+class CashPayment(BaseModel):
+    """Cash payment data"""
+    payment_method: Literal[PaymentMethod.CASH] = Field(..., description="Payment method (cash)")
+    cash_tendered: float = Field(
+        ...,
         ge=0,
-        description="Amount of cash received (required for CASH payment)"
+        description="Amount of cash received"
     )
-    tip_amount: Optional[float] = Field(
+    tip_amount: float = Field(
         default=0.0,
         ge=0,
         description="Tip amount in dollars"
     )
-    card_fee_id: Optional[int] = Field(
-        None,
-        description="ID of the card fee to apply (required for CARD payment)"
-    )
 
-    @validator('cash_tendered')
-    def validate_cash_payment(cls, v, values):
-        if values.get('payment_method') == PaymentMethod.CASH and v is None:
-            raise ValueError('cash_tendered is required for cash payments')
-        return v
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "payment_method": "cash",
+                "cash_tendered": 20.00,
+                "tip_amount": 2.00
+            }
+        }
 
-    @validator('card_fee_id')
-    def validate_card_payment(cls, v, values):
-        if values.get('payment_method') == PaymentMethod.CARD and v is None:
-            raise ValueError('card_fee_id is required for card payments')
-        return v
+class CardPayment(BaseModel):
+    """Card payment data"""
+    payment_method: Literal[PaymentMethod.CARD] = Field(..., description="Payment method (card)")
+    card_fee_id: int = Field(..., description="ID of the card fee to apply")
+    tip_amount: float = Field(
+        default=0.0,
+        ge=0,
+        description="Tip amount in dollars"
+    )
 
     class Config:
         json_schema_extra = {
             "example": {
-                "payment_method": "CARD",
+                "payment_method": "card",
                 "tip_amount": 5.00,
                 "card_fee_id": 1
             }
         }
 
+# Tagged on payment_method so only the matching model is validated
+PaymentData = Annotated[
+    Union[CashPayment, CardPayment],
+    Body(..., discriminator="payment_method")
+]
+
+def _mods_payload(mods: List[ModifierData]) -> List[dict]:
+    """Plain modifier dicts, built without pydantic's recursive .dict() walk"""
+    return [{"mod_list_id": mod.mod_list_id, "mod_id": mod.mod_id} for mod in mods]
+
+def _items_payload(items: List[OrderItemData]) -> List[dict]:
+    """Plain order item dicts in the shape validate_order_items expects"""
+    return [
+        {
+            "item_id": item.item_id,
+            "quantity": item.quantity,
+            "modifiers": _mods_payload(item.mods)
+        }
+        for item in items
+    ]
+
+def _order_line(item: Item, item_data: OrderItemData) -> OrderItem:
+    """Priced order line for a validated item, with its selected modifiers"""
+    mods_by_key = {
+        (mod_list.id, mod.id): mod
+        for mod_list in item.mod_lists
+        for mod in mod_list.mods
+    }
+    selected = [mods_by_key[(mod.mod_list_id, mod.mod_id)] for mod in item_data.mods]
+    mods_price = sum(mod.mod_price for mod in selected)
+    return OrderItem(
+        item_id=item.id,
+        quantity=item_data.quantity,
+        item_price=item.reg_price,
+        mods_price=mods_price,
+        total_price=(item.reg_price + mods_price) * item_data.quantity,
+        mods=[
+            OrderItemMod(mod_id=mod.id, mod_price=mod.mod_price, mod_name=mod.name)
+            for mod in selected
+        ]
+    )
+
+def _recalculate_totals(db: Session, order: Order) -> None:
+    """Re-sum the subtotal from the loaded lines, then the total via Order.calculate_total"""
+    order.subtotal = sum(line.total_price for line in order.items)
+    order.calculate_total(db)
+
+def _is_order_number_conflict(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is ux_order_active_number rejecting a number"""
+    # SQLite names the indexed column, other backends the index
+    message = str(error.orig)
+    return "ux_order_active_number" in message or "orders.order_number" in message
+
+def _apply_totals(db: Session, order: Order, totals: dict) -> None:
+    """
+    Persist recalculated totals with a single UPDATE and mirror them onto the
+    loaded order without recording attribute history or needing a refresh.
+    """
+    values = {key: value for key, value in totals.items() if key in Order.__table__.c}
+    if not values:
+        return
+    
+    # Bump the version stamp explicitly so the loaded instance sees it too
+    values["updated_at"] = datetime.utcnow()
+    
+    db.execute(
+        update(Order)
+        .where(Order.id == order.id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    for key, value in values.items():
+        set_committed_value(order, key, value)
+
+def _tip_totals(order: Order, tip_amount: float) -> dict:
+    """Totals after replacing the order's tip, matching Order.calculate_total"""
+    return {
+        "tip_amount": tip_amount,
+        "total": order.total - (order.tip_amount or 0.0) + tip_amount
+    }
+
 # Routes
 @router.get(
     "",
-    response_model=List[dict],
     summary="List Orders",
     response_description="List of orders"
 )
 async def list_orders(
     status: Optional[str] = None,
     date: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of orders to return (all by default)"),
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """List orders with optional filters"""
-    query = db.query(Order)
+    query = db.query(Order).options(*order_load_options())
     
     if status:
         query = query.filter(Order.status == status)
     
     if date:
         try:
-            filter_date = datetime.strptime(date, "%Y-%m-%d")
+            if not _DATE_RE.fullmatch(date):
+                raise ValueError(date)
+            filter_date = datetime.fromisoformat(date)
             query = query.filter(
                 Order.created_at >= filter_date,
                 Order.created_at < filter_date + timedelta(days=1)
@@ -175,70 +292,95 @@ async def list_orders(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
+    # Newest first, matching the (status, created_at DESC) index
+    query = query.order_by(Order.created_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
     orders = query.all()
-    return [order.to_dict() for order in orders]
+    return ORJSONResponse([order.to_dict() for order in orders])
 
 @router.post(
     "",
-    response_model=dict,
     status_code=status.HTTP_201_CREATED,
     summary="Create Order",
     response_description="Created order details"
 )
 async def create_order(
     order_data: OrderCreate,
-    background_tasks: BackgroundTasks,
     current_staff: Staff = Depends(get_current_staff),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    entity_cache: dict = Depends(get_entity_cache)
 ):
     """Create a new order"""
     try:
-        # Validate items and modifiers
-        validate_order_items(db, [item.dict() for item in order_data.items])
+        # Validate items and modifiers, reusing the prefetched items below
+        items_by_id = validate_order_items(db, _items_payload(order_data.items), cache=entity_cache)
         
-        # Get next order number
-        order_number = get_next_order_number(db)
+        missing = {item_data.item_id for item_data in order_data.items} - items_by_id.keys()
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Item {min(missing)} not found")
         
-        # Create order
-        order = Order(
-            order_number=order_number,
-            staff_id=current_staff.id,
-            status=OrderStatus.PREP
-        )
-        db.add(order)
-        db.flush()
+        # Price every line, and snapshot its modifiers, from the prefetched items
+        lines = [
+            _order_line(items_by_id[item_data.item_id], item_data)
+            for item_data in order_data.items
+        ]
+        subtotal = sum(line.total_price for line in lines)
         
-        # Add items
-        for item_data in order_data.items:
-            item = db.query(Item).get(item_data.item_id)
-            if not item:
-                raise HTTPException(status_code=404, detail=f"Item {item_data.item_id} not found")
-            
-            order_item = OrderItem(
-                order_id=order.id,
-                item_id=item_data.item_id,
-                quantity=item_data.quantity
+        # Create order. ux_order_active_number rejects a number that is still
+        # active (another terminal took it, or the numbering wrapped onto an
+        # open order), so on conflict move on to the next free number. The
+        # remaining attempts cover races with other terminals.
+        order_number = get_next_order_number(db)
+        for attempt in range(ORDER_NUMBER_ATTEMPTS):
+            order = Order(
+                order_number=order_number,
+                staff_id=current_staff.id,
+                status=OrderStatus.PREP,
+                subtotal=subtotal,
+                tax=0.0,
+                total=subtotal
             )
-            db.add(order_item)
+            db.add(order)
+            try:
+                db.flush()
+                break
+            except IntegrityError as e:
+                db.rollback()
+                if not _is_order_number_conflict(e):
+                    raise
+                # Jump straight to the next number no active order holds, and
+                # move the counter there so later requests start from it too
+                free_number = next_free_order_number(db, order_number)
+                if free_number is None or attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="No free order number available"
+                    )
+                order_number = free_number
+                record_order_number(order_number)
+        
+        # Add items; their modifiers follow through the relationship cascade
+        for line in lines:
+            line.order_id = order.id
+        db.add_all(lines)
         
         db.commit()
-        db.refresh(order)
         
         # Send to kitchen display and printer
-        background_tasks.add_task(send_to_physical_printer, order.id)
-        background_tasks.add_task(send_to_kds, order.id)
+        print_queue.enqueue(_send_to_physical_printer, order.id)
+        print_queue.enqueue(_send_to_kds, order.id)
         
         # Broadcast update
         await manager.broadcast_order_update(order.id, "created")
         
-        return order.to_dict()
+        return ORJSONResponse(order.to_dict(), status_code=status.HTTP_201_CREATED)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get(
     "/{order_id}",
-    response_model=dict,
     summary="Get Order",
     response_description="Order details"
 )
@@ -260,14 +402,13 @@ async def get_order(order_id: int, db: Session = Depends(get_db)):
     - 401: Not authenticated
     - 404: Order not found
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return order.to_dict()
+    return ORJSONResponse(order.to_dict())
 
 @router.post(
     "/{order_id}/items",
-    response_model=dict,
     status_code=status.HTTP_201_CREATED,
     summary="Add Item to Order",
     response_description="Updated order details"
@@ -275,14 +416,14 @@ async def get_order(order_id: int, db: Session = Depends(get_db)):
 async def add_item(
     order_id: int,
     item: OrderItemData,
-    background_tasks: BackgroundTasks,
     current_staff: Staff = Depends(get_current_staff),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    entity_cache: dict = Depends(get_entity_cache)
 ):
     """
     Add an item to an existing order.
 
-    Can only add items to orders with OPEN status.
+    Can only add items to orders in PREP status.
     Automatically updates order totals.
     Sends updates to kitchen display.
 
@@ -301,60 +442,36 @@ async def add_item(
     - 401: Not authenticated
     - 404: Order or item not found
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    if order.status != OrderStatus.OPEN:
+    if order.status != OrderStatus.PREP:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Can only add items to open orders"
+            detail="Can only add items to orders in prep"
         )
     
     try:
-        # Validate item and modifiers
-        validate_order_items(db, [item.dict()])
-        
-        # Get item for price snapshot
-        db_item = db.query(Item).get(item.item_id)
-        
-        # Add item
-        order_item = OrderItem(
-            order_id=order.id,
-            item_id=item.item_id,
-            quantity=item.quantity,
-            price_each=db_item.price,
-            modifiers=[mod.dict() for mod in item.mods]
-        )
-        db.add(order_item)
+        # Validate item and modifiers, keeping the fetched item for the price snapshot
+        items_by_id = validate_order_items(db, _items_payload([item]), cache=entity_cache)
+        if item.item_id not in items_by_id:
+            raise HTTPException(status_code=404, detail=f"Item {item.item_id} not found")
         
-        # Recalculate totals
-        totals = calculate_order_totals(
-            db, order,
-            discount_id=order.discount_id,
-            card_fee_id=order.card_fee_id,
-            tip_amount=order.tip_amount
-        )
-        
-        # Update order totals
-        for key, value in totals.items():
-            setattr(order, key, value)
+        # Append through the relationship so the loaded items stay current
+        order.items.append(_order_line(items_by_id[item.item_id], item))
+        _recalculate_totals(db, order)
         
         db.commit()
-        db.refresh(order)
         
         # Broadcast order update
         order_dict = order.to_dict()
         await manager.broadcast_order_update(order_dict)
         
         # Send update to KDS
-        background_tasks.add_task(
-            send_to_kds,
-            order.order_number,
-            [item.dict() for item in order.items]
-        )
+        print_queue.enqueue(_send_to_kds, order.order_number, order_dict["items"], current_staff.name)
         
-        return order_dict
+        return ORJSONResponse(order_dict, status_code=status.HTTP_201_CREATED)
         
     except ValueError as e:
         raise HTTPException(
@@ -364,21 +481,19 @@ async def add_item(
 
 @router.delete(
     "/{order_id}/items/{item_id}",
-    response_model=dict,
     summary="Remove Item from Order",
     response_description="Updated order details"
 )
 async def remove_item(
     order_id: int,
     item_id: int,
-    background_tasks: BackgroundTasks,
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """
     Remove an item from an order.
 
-    Can only remove items from orders with OPEN status.
+    Can only remove items from orders in PREP status.
     Automatically updates order totals.
     Sends updates to kitchen display.
 
@@ -394,14 +509,14 @@ async def remove_item(
     - 401: Not authenticated
     - 404: Order or item not found
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    if order.status != OrderStatus.OPEN:
+    if order.status != OrderStatus.PREP:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Can only remove items from open orders"
+            detail="Can only remove items from orders in prep"
         )
     
     item = db.query(OrderItem).filter(
@@ -411,92 +526,79 @@ async def remove_item(
     if not item:
         raise HTTPException(status_code=404, detail="Item not found in order")
     
-    db.delete(item)
-    
-    # Recalculate totals
-    totals = calculate_order_totals(
-        db, order,
-        discount_id=order.discount_id,
-        card_fee_id=order.card_fee_id,
-        tip_amount=order.tip_amount
-    )
-    
-    # Update order totals
-    for key, value in totals.items():
-        setattr(order, key, value)
+    # Removing from the relationship deletes the row (delete-orphan cascade)
+    # and keeps the loaded items current
+    order.items.remove(item)
+    _recalculate_totals(db, order)
     
     db.commit()
-    db.refresh(order)
     
     # Broadcast order update
     order_dict = order.to_dict()
     await manager.broadcast_order_update(order_dict)
     
     # Send update to KDS
-    background_tasks.add_task(
-        send_to_kds,
-        order.order_number,
-        [item.dict() for item in order.items]
-    )
+    print_queue.enqueue(_send_to_kds, order.order_number, order_dict["items"], current_staff.name)
     
-    return order_dict
+    return ORJSONResponse(order_dict)
 
-@router.put("/{order_id}", response_model=dict)
+@router.put("/{order_id}")
 async def update_order(
     order_id: int,
     order_data: OrderUpdate,
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
-    """Update order details (discount, card fee, tip)"""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    """Update order details (notes, payment method, tip)"""
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    if order.status != OrderStatus.OPEN:
+    if order.status != OrderStatus.PREP:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Can only update open orders"
+            detail="Can only update orders in prep"
         )
     
+    # The tip is a plain addend in the totals formula (see _apply_pricing): when it
+    # is the only field sent, swap the stored tip in the total instead of
+    # recalculating everything
+    if order_data.__fields_set__ == {"tip_amount"} and order_data.tip_amount is not None:
+        _apply_totals(db, order, _tip_totals(order, order_data.tip_amount))
+        db.commit()
+        
+        order_dict = order.to_dict()
+        await manager.broadcast_order_update(order_dict)
+        return ORJSONResponse(order_dict)
+    
     # Update fields and recalculate totals
-    if order_data.discount_id is not None:
-        order.discount_id = order_data.discount_id
-    if order_data.card_fee_id is not None:
-        order.card_fee_id = order_data.card_fee_id
+    if order_data.notes is not None:
+        order.notes = order_data.notes
+    if order_data.payment_method is not None:
+        order.payment_method = order_data.payment_method
     if order_data.tip_amount is not None:
         order.tip_amount = order_data.tip_amount
     
-    totals = calculate_order_totals(
-        db, order,
-        discount_id=order.discount_id,
-        card_fee_id=order.card_fee_id,
-        tip_amount=order.tip_amount
-    )
-    
-    # Update order totals
-    for key, value in totals.items():
-        setattr(order, key, value)
+    # The card fee follows the payment method
+    order.calculate_total(db)
     
     db.commit()
-    db.refresh(order)
     
     # Broadcast order update
     order_dict = order.to_dict()
     await manager.broadcast_order_update(order_dict)
     
-    return order_dict
+    return ORJSONResponse(order_dict)
 
-@router.post("/{order_id}/close", response_model=dict)
+@router.post("/{order_id}/close")
 async def close_order(
     order_id: int,
     payment_data: PaymentData,
-    background_tasks: BackgroundTasks,
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """Close an order with payment"""
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -534,27 +636,19 @@ async def close_order(
         order.done_at = datetime.utcnow()
         
         db.commit()
-        db.refresh(order)
         
         # Broadcast order update
         order_dict = order.to_dict()
         await manager.broadcast_order_update(order_dict)
         
-        # Print receipt in background
-        background_tasks.add_task(
-            print_receipt,
-            order.order_number,
-            [item.to_dict() for item in order.items],
-            order.subtotal,
-            order.tax,
-            order.total,
-            order.payment_method,
-            order.card_fee,
-            order.cash_tendered if order.payment_method == PaymentMethod.CASH else None,
-            order.cash_change if order.payment_method == PaymentMethod.CASH else None
-        )
+        # Persist and queue the receipt; the worker loads and formats the order itself.
+        # Tendered/change are not stored on the order, so they are passed along.
+        if order.payment_method == PaymentMethod.CASH:
+            print_queue.enqueue_receipt(db, order.id, order.cash_tendered, order.cash_change)
+        else:
+            print_queue.enqueue_receipt(db, order.id)
         
-        return order_dict
+        return ORJSONResponse(order_dict)
         
     except ValueError as e:
         raise HTTPException(
@@ -564,7 +658,6 @@ async def close_order(
 
 @router.post(
     "/{order_id}/discounts/{discount_id}",
-    response_model=dict,
     summary="Apply Discount",
     response_description="Updated order with applied discount"
 )
@@ -599,12 +692,10 @@ async def apply_discount(
         )
     
     db.commit()
-    db.refresh(order)
-    return order.to_dict()
+    return ORJSONResponse(order.to_dict())
 
 @router.delete(
     "/{order_id}/discounts/{discount_id}",
-    response_model=dict,
     summary="Remove Discount",
     response_description="Updated order after removing discount"
 )
@@ -635,71 +726,64 @@ async def remove_discount(
             detail="Discount not found on this order"
         )
     
-    # Remove discount
-    db.delete(order_discount)
+    # Remove discount through the relationship (delete-orphan cascade) so the
+    # recalculated total below no longer counts it
+    order.discounts.remove(order_discount)
     
     # Recalculate order total
     order.calculate_total(db)
     
     db.commit()
-    db.refresh(order)
-    return order.to_dict()
+    return ORJSONResponse(order.to_dict())
 
 @router.patch(
     "/{order_id}",
-    response_model=dict,
     summary="Update Order",
     response_description="Updated order details"
 )
 async def update_order_status(
     order_id: int,
-    status: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """Update order status"""
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    # Only the current status is needed to validate the transition
+    current = db.query(Order.id, Order.status).filter(Order.id == order_id).first()
+    if not current:
         raise HTTPException(status_code=404, detail="Order not found")
     
     if status:
-        # Validate status transition
-        valid_transitions = {
-            OrderStatus.PREP: [OrderStatus.READY, OrderStatus.CANCELLED],
-            OrderStatus.READY: [OrderStatus.DONE],
-            OrderStatus.DONE: [],  # No transitions allowed from DONE
-            OrderStatus.CANCELLED: [],  # No transitions allowed from CANCELLED
-            OrderStatus.REFUNDED: [],  # No transitions allowed from REFUNDED
-            OrderStatus.PARTIALLY_REFUNDED: []  # No transitions allowed from PARTIALLY_REFUNDED
-        }
-        
-        if status not in [s.value for s in OrderStatus]:
-            raise HTTPException(status_code=400, detail="Invalid status")
-            
-        new_status = OrderStatus(status)
-        if new_status not in valid_transitions.get(order.status, []):
+        # Status membership is validated by FastAPI; only the transition is checked here
+        new_status = status
+        if new_status not in _VALID_TRANSITIONS.get(current.status, frozenset()):
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid status transition from {order.status} to {new_status}"
+                detail=f"Invalid status transition from {current.status} to {new_status}"
             )
         
-        order.status = new_status
+        values = {"status": new_status}
         if new_status == OrderStatus.DONE:
-            order.done_at = datetime.utcnow()
-        elif new_status == OrderStatus.CANCELLED:
-            order.cancelled_at = datetime.utcnow()
+            # Stamped by the database as part of the UPDATE itself
+            values["done_at"] = func.now()
         
+        db.execute(
+            update(Order)
+            .where(Order.id == order_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
-        db.refresh(order)
         
         # Broadcast update
-        await manager.broadcast_order_update(order.id, status)
+        await manager.broadcast_order_update(order_id, status)
     
-    return order.to_dict()
+    # Load the full order only to build the response
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
+    return ORJSONResponse(order.to_dict())
 
 @router.post(
     "/{order_id}/cancel",
-    response_model=dict,
     summary="Cancel Order",
     response_description="Cancelled order details"
 )
@@ -709,18 +793,29 @@ async def cancel_order(
     db: Session = Depends(get_db)
 ):
     """Cancel an open order"""
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    # Only the current status is needed to validate the cancellation
+    current = db.query(Order.id, Order.status).filter(Order.id == order_id).first()
+    if not current:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    if order.status != OrderStatus.PREP:
+    if current.status != OrderStatus.PREP:
         raise HTTPException(status_code=400, detail="Can only cancel orders in PREP status")
     
-    order.status = OrderStatus.CANCELLED
-    order.cancelled_at = datetime.utcnow()
+    # Guard on the status as well so a concurrent transition is not overwritten
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == OrderStatus.PREP)
+        .values(status=OrderStatus.VOID)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Can only cancel orders in PREP status")
     db.commit()
     
     # Broadcast update
-    await manager.broadcast_order_update(order.id, "cancelled")
+    await manager.broadcast_order_update(order_id, "cancelled")
     
-    return order.to_dict() 
\ No newline at end of file
+    # Load the full order only to build the response
+    order = db.query(Order).options(*order_load_options()).filter(Order.id == order_id).first()
+    return ORJSONResponse(order.to_dict())
\ No newline at end of file
@@ -1,18 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
-import uuid
 
 from models import Staff, Order, OrderStatus, PaymentMethod, get_db
+from models.order import order_load_options
 from models.system import CardFeeSettings
 from utils.auth import get_current_staff
-from utils.square import process_card_payment, process_refund, get_payment_status, check_connection
+from utils.square import (
+    process_card_payment,
+    process_refund as square_process_refund,
+    get_payment_status as square_get_payment_status,
+    check_connection
+)
 from utils.order_validation import calculate_order_totals
 from utils.websocket import manager
 from utils.network import network_manager
-from Printer.printer import print_receipt
+from utils.print_queue import print_queue
 
 router = APIRouter(
     prefix="/payments",
@@ -68,12 +73,11 @@ class RefundRequest(BaseModel):
 )
 async def process_payment(
     payment: PaymentRequest,
-    background_tasks: BackgroundTasks,
     current_staff: Staff = Depends(get_current_staff),
     db: Session = Depends(get_db)
 ):
     """Process a payment for an order"""
-    order = db.query(Order).filter(Order.id == payment.order_id).first()
+    order = db.get(Order, payment.order_id, options=order_load_options())
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -95,13 +99,13 @@ async def process_payment(
             try:
                 # Process card payment
                 payment_result = await process_card_payment(
+                    amount=payment.amount,  # Converted to cents by the Square helper
                     source_id=payment.payment_details["source_id"],
-                    amount=int(payment.amount * 100),  # Convert to cents
-                    order_id=str(order.id),
-                    order_number=order.order_number
+                    reference_id=str(order.id),
+                    note=f"Order #{order.order_number}"
                 )
 
-                if payment_result["status"] == "success":
+                if payment_result["success"]:
                     order.payment_method = PaymentMethod.CARD
                     order.status = OrderStatus.DONE
                     order.done_at = datetime.utcnow()
@@ -112,8 +116,8 @@ async def process_payment(
                     
                     db.commit()
                     
-                    # Schedule receipt printing
-                    background_tasks.add_task(print_receipt, order.id)
+                    # Persist and queue the receipt; the print worker handles the printer
+                    print_queue.enqueue_receipt(db, order.id)
                     await manager.broadcast_order_update(order.id, "done")
                     
                     return {
@@ -157,8 +161,8 @@ async def process_payment(
 
             db.commit()
 
-            # Schedule receipt printing
-            background_tasks.add_task(print_receipt, order.id)
+            # Persist and queue the receipt; the print worker handles the printer
+            print_queue.enqueue_receipt(db, order.id, cash_tendered, order.cash_change)
             await manager.broadcast_order_update(order.id, "done")
 
             return {
@@ -198,7 +202,7 @@ async def process_refund(
             detail="Only admins can process refunds"
         )
 
-    order = db.query(Order).filter(Order.id == refund.order_id).first()
+    order = db.get(Order, refund.order_id, options=order_load_options())
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -217,13 +221,12 @@ async def process_refund(
             )
 
         try:
-            refund_result = await process_refund(
+            refund_result = await square_process_refund(
                 payment_id=payment_id,
-                amount=refund.amount,
-                reason=refund.reason
+                amount=refund.amount
             )
 
-            if refund_result["status"] == "success":
+            if refund_result["success"]:
                 order.status = OrderStatus.REFUNDED if refund.amount >= order.total else OrderStatus.PARTIALLY_REFUNDED
                 order.refunded_at = datetime.utcnow()
                 order.refund_amount = refund.amount
@@ -248,6 +251,8 @@ async def process_refund(
             # Disable internet after transaction
             await network_manager.disable_internet()
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -266,13 +271,20 @@ async def get_payment_status(
 ):
     """Get the current status of a payment"""
     try:
-        status_result = await get_payment_status(payment_id)
+        status_result = await square_get_payment_status(payment_id)
+        if not status_result["success"]:
+            raise HTTPException(
+                status_code=400,
+                detail=status_result.get("error", "Failed to get payment status")
+            )
         return {
             "success": True,
             "status": status_result["status"],
             "receipt_url": status_result.get("receipt_url"),
             "card_details": status_result.get("card_details")
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
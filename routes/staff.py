@@ -5,8 +5,8 @@ from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime, date
 
-from models import Staff, StaffRole, StaffShift, get_db
-from utils.auth import get_current_staff, verify_admin
+from models import Staff, StaffShift, get_db
+from utils.auth import get_current_staff, get_pin_hmac, verify_admin
 
 router = APIRouter(
     prefix="/staff/admin",
@@ -29,7 +29,7 @@ class StaffCreate(BaseModel):
 
     @validator('pin')
     def validate_pin(cls, v):
-        if not v.isdigit():
+        if not (v.isascii() and v.isdecimal()):
             raise ValueError("PIN must contain only digits")
         return v
 
@@ -54,7 +54,7 @@ class StaffUpdate(BaseModel):
 
     @validator('pin')
     def validate_pin(cls, v):
-        if v is not None and not v.isdigit():
+        if v is not None and not (v.isascii() and v.isdecimal()):
             raise ValueError("PIN must contain only digits")
         return v
 
@@ -70,7 +70,7 @@ class StaffUpdate(BaseModel):
 
 def check_pin_unique(pin: str, db: Session, exclude_staff_id: int = None) -> bool:
     """Check if a PIN is unique among all staff members"""
-    query = db.query(Staff).filter(Staff.pin == pin)
+    query = db.query(Staff).filter(Staff.pin_hmac == get_pin_hmac(pin))
     if exclude_staff_id:
         query = query.filter(Staff.id != exclude_staff_id)
     return query.first() is None
@@ -112,13 +112,14 @@ async def create_staff(staff_data: StaffCreate, db: Session = Depends(get_db)):
     The PIN must be unique across all staff members.
     """
     # Check if PIN is already in use
-    existing = db.query(Staff).filter(Staff.pin == staff_data.pin).first()
+    existing = db.query(Staff).filter(Staff.pin_hmac == get_pin_hmac(staff_data.pin)).first()
     if existing:
         raise HTTPException(status_code=400, detail="PIN is already in use")
     
     staff = Staff(
         name=staff_data.name,
         pin=staff_data.pin,
+        pin_hmac=get_pin_hmac(staff_data.pin),
         hourly_rate=staff_data.hourly_rate,
         isAdmin=staff_data.isAdmin,
         available=staff_data.available
@@ -148,12 +149,13 @@ async def update_staff(
     
     if updates.pin is not None:
         existing = db.query(Staff).filter(
-            Staff.pin == updates.pin,
+            Staff.pin_hmac == get_pin_hmac(updates.pin),
             Staff.id != staff_id
         ).first()
         if existing:
             raise HTTPException(status_code=400, detail="PIN is already in use")
         staff.pin = updates.pin
+        staff.pin_hmac = get_pin_hmac(updates.pin)
     
     if updates.name is not None:
         if len(updates.name.strip()) == 0:
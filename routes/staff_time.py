@@ -1,20 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, constr
 from typing import Optional
 from datetime import datetime
-from database import get_db
+from models.base import get_async_db
 from models.staff import Staff, StaffShift
+from utils.auth import get_staff_by_pin_async
 
 router = APIRouter(tags=["Staff Time"])
 
+async def _get_open_shift(db: AsyncSession, staff_id: int) -> StaffShift:
+    """The staff member's open shift (served by ix_shift_staff_open), 404 if there is none"""
+    shift = (await db.execute(
+        select(StaffShift)
+        .where(StaffShift.staff_id == staff_id, StaffShift.clock_out.is_(None))
+        .limit(1)
+    )).scalar_one_or_none()
+    if shift is None:
+        raise HTTPException(status_code=404, detail="No active shift found")
+    return shift
+
 class PinAuth(BaseModel):
     pin: constr(min_length=4, max_length=4)
 
 @router.post("/clock-in")
-def clock_in(auth: PinAuth, db: Session = Depends(get_db)):
+async def clock_in(auth: PinAuth, db: AsyncSession = Depends(get_async_db)):
     """Clock in a staff member for their shift"""
-    staff = db.query(Staff).filter(Staff.pin == auth.pin).first()
+    staff = await get_staff_by_pin_async(db, auth.pin)
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
     
@@ -33,7 +46,7 @@ def clock_in(auth: PinAuth, db: Session = Depends(get_db)):
     staff.is_working = True
     
     db.add(shift)
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -41,9 +54,9 @@ def clock_in(auth: PinAuth, db: Session = Depends(get_db)):
     }
 
 @router.post("/clock-out")
-def clock_out(auth: PinAuth, db: Session = Depends(get_db)):
+async def clock_out(auth: PinAuth, db: AsyncSession = Depends(get_async_db)):
     """Clock out a staff member from their shift"""
-    staff = db.query(Staff).filter(Staff.pin == auth.pin).first()
+    staff = await get_staff_by_pin_async(db, auth.pin)
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
     
@@ -53,18 +66,12 @@ def clock_out(auth: PinAuth, db: Session = Depends(get_db)):
     if staff.is_on_break:
         raise HTTPException(status_code=400, detail="Must end break before clocking out")
     
-    # Find current shift
-    shift = db.query(StaffShift)\
-        .filter(StaffShift.staff_id == staff.id, StaffShift.clock_out == None)\
-        .first()
-    
-    if not shift:
-        raise HTTPException(status_code=404, detail="No active shift found")
-    
+    # Both rows are written in one flush; with expire_on_commit=False they stay
+    # loaded, so the response needs no reload
+    shift = await _get_open_shift(db, staff.id)
     shift.clock_out = datetime.now()
     staff.is_working = False
-    
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -72,9 +79,9 @@ def clock_out(auth: PinAuth, db: Session = Depends(get_db)):
     }
 
 @router.post("/break/start")
-def start_break(auth: PinAuth, db: Session = Depends(get_db)):
+async def start_break(auth: PinAuth, db: AsyncSession = Depends(get_async_db)):
     """Start a break during the current shift"""
-    staff = db.query(Staff).filter(Staff.pin == auth.pin).first()
+    staff = await get_staff_by_pin_async(db, auth.pin)
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
     
@@ -84,18 +91,10 @@ def start_break(auth: PinAuth, db: Session = Depends(get_db)):
     if staff.is_on_break:
         raise HTTPException(status_code=400, detail="Already on break")
     
-    # Find current shift
-    shift = db.query(StaffShift)\
-        .filter(StaffShift.staff_id == staff.id, StaffShift.clock_out == None)\
-        .first()
-    
-    if not shift:
-        raise HTTPException(status_code=404, detail="No active shift found")
-    
+    shift = await _get_open_shift(db, staff.id)
     shift.break_start = datetime.now()
     staff.is_on_break = True
-    
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -103,9 +102,9 @@ def start_break(auth: PinAuth, db: Session = Depends(get_db)):
     }
 
 @router.post("/break/end")
-def end_break(auth: PinAuth, db: Session = Depends(get_db)):
+async def end_break(auth: PinAuth, db: AsyncSession = Depends(get_async_db)):
     """End a break during the current shift"""
-    staff = db.query(Staff).filter(Staff.pin == auth.pin).first()
+    staff = await get_staff_by_pin_async(db, auth.pin)
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
     
@@ -115,18 +114,10 @@ def end_break(auth: PinAuth, db: Session = Depends(get_db)):
     if not staff.is_on_break:
         raise HTTPException(status_code=400, detail="Not on break")
     
-    # Find current shift
-    shift = db.query(StaffShift)\
-        .filter(StaffShift.staff_id == staff.id, StaffShift.clock_out == None)\
-        .first()
-    
-    if not shift:
-        raise HTTPException(status_code=404, detail="No active shift found")
-    
+    shift = await _get_open_shift(db, staff.id)
     shift.break_end = datetime.now()
     staff.is_on_break = False
-    
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -134,17 +125,19 @@ def end_break(auth: PinAuth, db: Session = Depends(get_db)):
     }
 
 @router.get("/status")
-def get_status(auth: PinAuth, db: Session = Depends(get_db)):
+async def get_status(auth: PinAuth, db: AsyncSession = Depends(get_async_db)):
     """Get current working status and earnings for a staff member"""
-    staff = db.query(Staff).filter(Staff.pin == auth.pin).first()
+    staff = await get_staff_by_pin_async(db, auth.pin)
     if not staff:
         raise HTTPException(status_code=401, detail="Invalid PIN")
     
     current_shift = None
     if staff.is_working:
-        current_shift = db.query(StaffShift)\
-            .filter(StaffShift.staff_id == staff.id, StaffShift.clock_out == None)\
-            .first()
+        current_shift = (await db.execute(
+            select(StaffShift)
+            .where(StaffShift.staff_id == staff.id, StaffShift.clock_out.is_(None))
+            .limit(1)
+        )).scalar_one_or_none()
     
     return {
         "success": True,
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from utils.websocket import manager
 import logging
+import orjson
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Constant reply, encoded once
+PONG_MESSAGE = '{"type":"pong"}'
+
 @router.websocket("/ws/{client_type}/{client_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -26,10 +30,15 @@ async def websocket_endpoint(
     await manager.connect(client_type, client_id, websocket)
     try:
         while True:
-            data = await websocket.receive_json()
+            # Decode with orjson; accept both text and binary frames
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            raw = message.get("text")
+            data = orjson.loads(raw if raw is not None else message.get("bytes"))
             
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(PONG_MESSAGE)
             
             elif data.get("type") == "watch_order":
                 order_id = data.get("order_id")
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 import os
 import sys
-import json
 import logging
+from functools import lru_cache
 from pathlib import Path
-from sqlalchemy import create_engine, inspect, text
+import orjson
+from sqlalchemy import create_engine, func, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from models import (
     Base, Staff, Category, Item, ModList, Mod,
     DiscountGroup, CardFeeSettings, StaffShift,
     Order, OrderItem, OrderItemMod, OrderStatus, PaymentMethod
 )
+from utils.auth import get_pin_hash, get_pin_hmac
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,108 +38,130 @@ def check_usb_mount():
     
     return db_dir
 
+@lru_cache(maxsize=1)
+def _read_default_data(path: str, mtime_ns: int) -> dict:
+    """Parse default_data.json; keyed on mtime so edits are picked up"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
 def load_default_data():
     """Load default data from default_data.json"""
     default_data_path = Path(__file__).resolve().parent.parent / 'default_data.json'
     try:
-        with open(default_data_path, 'r') as f:
-            return json.load(f)
+        return _read_default_data(str(default_data_path), default_data_path.stat().st_mtime_ns)
     except FileNotFoundError:
         logger.error(f"default_data.json not found at {default_data_path}")
         return None
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Error parsing default_data.json: {e}")
         return None
 
 def init_staff(session: Session, staff_data: list):
     """Initialize default staff"""
-    if not session.query(Staff).first():
-        for staff_member in staff_data:
-            # Ensure staff ID is a six-digit number
-            staff_id = 100000 + len(session.query(Staff).all())
-            staff = Staff(
-                id=staff_id,
-                name=staff_member['name'],
-                pin=staff_member['pin'],
-                hourly_rate=staff_member['hourly_rate'],
-                isAdmin=staff_member['isAdmin'],
-                is_working=staff_member['working'],
-                is_on_break=staff_member['break'],
-                available=True
-            )
-            session.add(staff)
-            logger.info(f"Added default staff member: {staff_member['name']}")
+    if not session.query(Staff.id).first():
+        # Six-digit IDs counted up locally from the current maximum
+        first_id = (session.query(func.max(Staff.id)).scalar() or 99999) + 1
+        rows = [
+            {
+                "id": staff_id,
+                "name": staff_member['name'],
+                "pin": get_pin_hash(staff_member['pin']),
+                "pin_hmac": get_pin_hmac(staff_member['pin']),
+                "hourly_rate": staff_member['hourly_rate'],
+                "isAdmin": staff_member['isAdmin'],
+                "is_working": staff_member['working'],
+                "is_on_break": staff_member['break'],
+                "available": True
+            }
+            for staff_id, staff_member in enumerate(staff_data, start=first_id)
+        ]
+        if rows:
+            session.execute(Staff.__table__.insert(), rows)
+        logger.info(f"Added {len(rows)} default staff members")
 
 def init_categories(session: Session, categories_data: list):
     """Initialize default categories"""
-    if not session.query(Category).first():
+    if not session.query(Category.id).first():
+        next_id = (session.query(func.max(Category.id)).scalar() or 99999) + 1
+        rows = []
         for cat_data in categories_data:
             # Ensure category ID is a six-digit number
             category_id = cat_data.get('category_id')
             if not category_id or category_id < 100000 or category_id >= 1000000:
-                category_id = 100000 + len(session.query(Category).all())
+                category_id = next_id
+            next_id = max(next_id, category_id + 1)
             
-            category = Category(
-                name=cat_data['name'],
-                sort_order=cat_data['sort_order'],
-                id=category_id,
-                available=True
-            )
-            session.add(category)
-            logger.info(f"Added category: {cat_data['name']}")
+            rows.append({
+                "id": category_id,
+                "name": cat_data['name'],
+                "sort_order": cat_data['sort_order'],
+                "available": True
+            })
+        if rows:
+            session.execute(Category.__table__.insert(), rows)
+        logger.info(f"Added {len(rows)} categories")
 
 def init_items(session: Session, items_data: list):
     """Initialize default items"""
-    if not session.query(Item).first():
-        for item_data in items_data:
-            # Ensure item ID is a six-digit number
-            item_id = 100000 + len(session.query(Item).all())
-            item = Item(
-                id=item_id,
-                name=item_data['name'],
-                reg_price=item_data['reg_price'],
-                event_price=item_data.get('event_price', item_data['reg_price']),
-                category_id=item_data['category_id'],
-                sort_order=item_data['sort_order'],
-                available=item_data['available']
-            )
-            session.add(item)
-            logger.info(f"Added item: {item_data['name']}")
+    if not session.query(Item.id).first():
+        # Six-digit IDs counted up locally from the current maximum
+        first_id = (session.query(func.max(Item.id)).scalar() or 99999) + 1
+        rows = [
+            {
+                "id": item_id,
+                "name": item_data['name'],
+                "reg_price": item_data['reg_price'],
+                "event_price": item_data.get('event_price', item_data['reg_price']),
+                "category_id": item_data['category_id'],
+                "sort_order": item_data['sort_order'],
+                "available": item_data['available']
+            }
+            for item_id, item_data in enumerate(items_data, start=first_id)
+        ]
+        if rows:
+            session.execute(Item.__table__.insert(), rows)
+        logger.info(f"Added {len(rows)} items")
 
 def init_modlists(session: Session, modlists_data: list):
     """Initialize default modification lists"""
-    if not session.query(ModList).first():
+    if not session.query(ModList.id).first():
+        # Six-digit IDs counted up locally from the current maximums
+        next_modlist_id = (session.query(func.max(ModList.id)).scalar() or 99999) + 1
+        next_mod_id = (session.query(func.max(Mod.id)).scalar() or 99999) + 1
+        modlist_rows = []
+        mod_rows = []
         for modlist_data in modlists_data:
-            # Ensure modlist ID is a six-digit number
-            modlist_id = 100000 + len(session.query(ModList).all())
-            modlist = ModList(
-                id=modlist_id,
-                name=modlist_data['name'],
-                min_selections=modlist_data['min_selections'],
-                max_selections=modlist_data['max_selections'],
-                sort_order=modlist_data.get('sort_order', 0),
-                available=True
-            )
-            session.add(modlist)
-            session.flush()
+            modlist_rows.append({
+                "id": next_modlist_id,
+                "name": modlist_data['name'],
+                "min_selections": modlist_data['min_selections'],
+                "max_selections": modlist_data['max_selections'],
+                "sort_order": modlist_data.get('sort_order', 0),
+                "available": True
+            })
             
             for mod_data in modlist_data.get('mods', []):
-                # Ensure mod ID is a six-digit number
-                mod_id = 100000 + len(session.query(Mod).all())
-                mod = Mod(
-                    id=mod_id,
-                    name=mod_data['name'],
-                    mod_price=mod_data['mod_price'],
-                    mod_list_id=modlist.id,
-                    sort_order=mod_data.get('sort_order', 0),
-                    available=True
-                )
-                session.add(mod)
-            logger.info(f"Added modlist: {modlist_data['name']}")
+                mod_rows.append({
+                    "id": next_mod_id,
+                    "name": mod_data['name'],
+                    "mod_price": mod_data['mod_price'],
+                    "mod_list_id": next_modlist_id,
+                    "sort_order": mod_data.get('sort_order', 0),
+                    "available": True
+                })
+                next_mod_id += 1
+            next_modlist_id += 1
+        
+        # Parents first so the mods' foreign keys resolve
+        if modlist_rows:
+            session.execute(ModList.__table__.insert(), modlist_rows)
+        if mod_rows:
+            session.execute(Mod.__table__.insert(), mod_rows)
+        logger.info(f"Added {len(modlist_rows)} modlists with {len(mod_rows)} mods")
 
 def init_system_settings(session: Session):
     """Initialize system settings"""
-    if not session.query(CardFeeSettings).first():
+    if not session.query(CardFeeSettings.id).first():
         card_settings = CardFeeSettings(
             enabled=True,
             fee_percentage=2.5,
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import (
+    Base, Staff, Category, Item, ModList, Mod,
+    Order, OrderItem, OrderItemMod, OrderStatus
+)
+from models.base import set_sqlite_pragma
+from utils import auth, order_validation
+
+# Catalog and staff IDs are six digits (check constraints)
+STAFF_ID = 100001
+ITEM_ID = 100001
+MOD_LIST_ID = 100001
+MOD_ID = 100001
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory database with the app's pragmas"""
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture(autouse=True)
+def reset_module_caches():
+    """Module-level caches must not leak between tests"""
+    order_validation.reset_order_counter()
+    order_validation.invalidate_pricing_cache()
+    auth.invalidate_pin_cache()
+    yield
+    order_validation.reset_order_counter()
+    order_validation.invalidate_pricing_cache()
+    auth.invalidate_pin_cache()
+
+@pytest.fixture
+def catalog(db):
+    """One staff member and one item (5.00) with an optional 0.50 modifier"""
+    db.add(Staff(id=STAFF_ID, name="Test", pin="1234", hourly_rate=15.0))
+    db.add(Category(id=100001, name="Food"))
+    mod_list = ModList(id=MOD_LIST_ID, name="Extras", min_selections=0, max_selections=2)
+    item = Item(id=ITEM_ID, name="Burger", category_id=100001, reg_price=5.0, event_price=6.0)
+    item.mod_lists.append(mod_list)
+    db.add_all([mod_list, item])
+    db.add(Mod(id=MOD_ID, mod_list_id=MOD_LIST_ID, name="Cheese", mod_price=0.5))
+    db.commit()
+
+def add_order(db, status=OrderStatus.DONE, order_number=1, age=timedelta(days=2)):
+    """Insert an order with one modified line, created `age` ago"""
+    order = Order(
+        order_number=order_number,
+        staff_id=STAFF_ID,
+        status=status,
+        subtotal=5.5,
+        tax=0.0,
+        total=5.5,
+        created_at=datetime.utcnow() - age
+    )
+    db.add(order)
+    db.flush()
+    line = OrderItem(
+        order_id=order.id, item_id=ITEM_ID, quantity=1,
+        item_price=5.0, mods_price=0.5, total_price=5.5
+    )
+    db.add(line)
+    db.flush()
+    db.add(OrderItemMod(order_item_id=line.id, mod_id=MOD_ID, mod_price=0.5, mod_name="Cheese"))
+    db.commit()
+    return order
@@ -0,0 +1,96 @@
+import asyncio
+
+from fastapi.security import HTTPBasicCredentials
+from sqlalchemy import event
+
+from models import Staff
+from scripts.setup_database import init_staff
+from utils import auth
+from utils.auth import authenticate_staff, get_current_staff, get_pin_hash, get_pin_hmac
+
+SEED = [{"name": "Owner", "pin": "4321", "hourly_rate": 20.0, "isAdmin": True, "working": False, "break": False}]
+
+def _current_staff(db, pin):
+    return asyncio.run(get_current_staff(HTTPBasicCredentials(username=pin, password=""), db=db))
+
+def _with_digest(db, pin="1234"):
+    staff = db.get(Staff, 100001)
+    staff.pin_hmac = get_pin_hmac(pin)
+    db.commit()
+    return staff
+
+def test_seeded_staff_can_log_in(db):
+    init_staff(db, SEED)
+    db.commit()
+
+    staff = asyncio.run(authenticate_staff("4321", db))
+
+    assert staff is not None and staff.name == "Owner"
+    assert staff.pin != "4321"
+    assert asyncio.run(authenticate_staff("0000", db)) is None
+
+def test_cache_hit_runs_no_sql(db, catalog):
+    staff = _with_digest(db)
+    _current_staff(db, "1234")
+    # A new request starts with an empty identity map
+    db.expunge_all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        cached = _current_staff(db, "1234")
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert statements == []
+    assert (cached.id, cached.hourly_rate, cached.isAdmin) == (staff.id, 15.0, False)
+
+def test_hashed_legacy_rows_are_matched_and_backfilled(db):
+    db.add_all([
+        Staff(id=100001, name="First", pin=get_pin_hash("1111"), hourly_rate=15.0),
+        Staff(id=100002, name="Second", pin=get_pin_hash("2222"), hourly_rate=15.0),
+    ])
+    db.commit()
+
+    assert asyncio.run(authenticate_staff("9999", db)) is None
+    assert _current_staff(db, "2222").id == 100002
+    # Backfilled in its own transaction, so the next login is a digest lookup
+    db.expire_all()
+    assert db.get(Staff, 100002).pin_hmac == get_pin_hmac("2222")
+    assert db.get(Staff, 100001).pin_hmac is None
+
+def test_pin_cache_survives_shift_updates(db, catalog):
+    staff = _with_digest(db)
+    _current_staff(db, "1234")
+    assert auth._pin_cache is not None
+
+    staff.is_working = True
+    db.commit()
+    assert auth._pin_cache is not None
+
+    staff.hourly_rate = 17.0
+    db.commit()
+    assert auth._pin_cache is None
+    assert _current_staff(db, "1234").hourly_rate == 17.0
+
+    staff.pin = "5678"
+    staff.pin_hmac = get_pin_hmac("5678")
+    db.commit()
+    assert auth._pin_cache is None
+    assert _current_staff(db, "5678").id == staff.id
+
+def test_single_legacy_row_is_verified_on_a_worker_thread(db, monkeypatch):
+    db.add(Staff(id=100001, name="Only", pin=get_pin_hash("3333"), hourly_rate=15.0))
+    db.commit()
+    calls = []
+    verify = auth.verify_pin_async
+
+    async def tracking_verify(plain_pin, hashed_pin):
+        calls.append(plain_pin)
+        return await verify(plain_pin, hashed_pin)
+
+    monkeypatch.setattr(auth, "verify_pin_async", tracking_verify)
+
+    assert asyncio.run(authenticate_staff("3333", db)).id == 100001
+    assert calls == ["3333"]
@@ -0,0 +1,23 @@
+import asyncio
+
+from models import Staff
+from routes.auth import StaffCreate, StaffResponse, StaffUpdate, create_staff, update_staff
+from utils.auth import authenticate_staff
+from tests.conftest import STAFF_ID
+
+def test_update_staff_returns_the_to_dict_payload(db, catalog):
+    payload = asyncio.run(update_staff(STAFF_ID, StaffUpdate(isAdmin=True, available=False), db=db))
+
+    staff = db.get(Staff, STAFF_ID)
+    assert staff.isAdmin and not staff.available
+    assert payload == staff.to_dict()
+    assert StaffResponse(**payload).dict(by_alias=True) == payload
+
+def test_create_staff_inserts_only_staff_columns(db, catalog):
+    staff_data = StaffCreate(name="New Hire", pin="5678", hourly_rate=15.5)
+    payload = asyncio.run(create_staff(staff_data, db=db))
+
+    staff = db.get(Staff, payload["id"])
+    assert payload == staff.to_dict()
+    assert staff.hourly_rate == 15.5 and not staff.isAdmin
+    assert asyncio.run(authenticate_staff("5678", db)) is staff
@@ -0,0 +1,56 @@
+import asyncio
+
+from utils import network
+from utils.network import NetworkManager
+
+def test_grace_period_disable_task_is_kept_until_done(monkeypatch):
+    monkeypatch.setattr(network, "INTERNET_GRACE_PERIOD", 0)
+    toggles = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def fake_modify(self, allow):
+            toggles.append(allow)
+            if not allow:
+                await release.wait()
+            return True
+
+        monkeypatch.setattr(NetworkManager, "_modify_firewall_async", fake_modify)
+
+        manager = NetworkManager()
+        await manager.enable_internet()
+        await manager.disable_internet()
+        # Let the grace-period timer fire; the task is held while it runs
+        await asyncio.sleep(0.01)
+        task = manager._disable_task
+        assert task is not None and not task.done()
+
+        release.set()
+        await task
+        return manager
+
+    manager = asyncio.run(run())
+    assert toggles == [True, False]
+    assert not manager.internet_enabled
+    assert manager._disable_task is None
+
+def test_square_ips_are_re_resolved_after_the_ttl(monkeypatch):
+    answers = [["10.0.0.1"], ["10.0.0.2"], []]
+    monkeypatch.setattr(
+        network.socket, "getaddrinfo",
+        lambda *args: [(None, None, None, None, (ip, 443)) for ip in answers.pop(0)]
+    )
+    now = [1000.0]
+    monkeypatch.setattr(network.time, "monotonic", lambda: now[0])
+
+    manager = NetworkManager()
+    assert manager._resolve_square_ips() == ["10.0.0.1"]
+    now[0] += network.SQUARE_DNS_TTL - 1
+    assert manager._resolve_square_ips() == ["10.0.0.1"]
+
+    now[0] += 1
+    assert manager._resolve_square_ips() == ["10.0.0.2"]
+    # A failed lookup keeps the last known addresses
+    now[0] += network.SQUARE_DNS_TTL
+    assert manager._resolve_square_ips() == ["10.0.0.2"]
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from models import Order, OrderHistory, OrderItem, OrderItemMod, OrderStatus, PendingReceipt
+from utils.order_management import archive_completed_orders, daily_order_cleanup
+from tests.conftest import add_order
+
+def test_archive_moves_old_completed_orders_to_history(db, catalog):
+    for number in (1, 2, 3):
+        add_order(db, OrderStatus.DONE, number)
+    recent = add_order(db, OrderStatus.DONE, 4, age=timedelta(hours=1))
+
+    assert archive_completed_orders(db) == 3
+
+    assert [o.id for o in db.query(Order).all()] == [recent.id]
+    assert db.query(OrderHistory).count() == 3
+    # Children of archived orders are removed with them
+    assert db.query(OrderItem).count() == 1
+    assert db.query(OrderItemMod).count() == 1
+
+def test_daily_cleanup_archives_and_renumbers(db, catalog):
+    for number in (1, 2):
+        add_order(db, OrderStatus.DONE, number)
+    for number in (40, 12, 7):
+        add_order(db, OrderStatus.PREP, number)
+
+    assert daily_order_cleanup(db)
+
+    numbers = [n for (n,) in db.query(Order.order_number).order_by(Order.created_at)]
+    assert sorted(numbers) == [1, 2, 3]
+    assert db.query(OrderHistory).count() == 2
+
+def test_archive_keeps_orders_with_pending_receipts(db, catalog):
+    printed = add_order(db, OrderStatus.DONE, 1)
+    unprinted = add_order(db, OrderStatus.DONE, 2)
+    db.add(PendingReceipt(order_id=unprinted.id, amount_tendered=10.0, change=4.5))
+    db.commit()
+
+    assert archive_completed_orders(db) == 1
+
+    assert [o.id for o in db.query(Order).all()] == [unprinted.id]
+    assert db.query(PendingReceipt).count() == 1
+    assert db.query(OrderHistory).one().order_id == printed.id
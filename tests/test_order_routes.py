@@ -0,0 +1,137 @@
+import asyncio
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from models import CardFeeSettings, Order, OrderItem, OrderStatus, PaymentMethod, Staff
+from routes.order import (
+    ModifierData, OrderCreate, OrderItemData, OrderUpdate, add_item, create_order, list_orders, update_order
+)
+from utils.order_management import daily_order_cleanup
+from utils.print_queue import print_queue
+from utils import order_validation
+from tests.conftest import ITEM_ID, MOD_ID, MOD_LIST_ID, STAFF_ID, add_order
+
+def _create(db, quantity=1, mods=()):
+    order_data = OrderCreate(items=[OrderItemData(
+        item_id=ITEM_ID,
+        quantity=quantity,
+        mods=[ModifierData(mod_list_id=MOD_LIST_ID, mod_id=mod_id) for mod_id in mods]
+    )])
+    staff = db.get(Staff, STAFF_ID)
+    asyncio.run(create_order(order_data, current_staff=staff, db=db, entity_cache={}))
+    return db.query(Order).order_by(Order.id.desc()).first()
+
+def test_create_order_sets_totals(db, catalog):
+    order = _create(db, quantity=2)
+
+    assert order.order_number == 1
+    assert order.status == OrderStatus.PREP
+    assert (order.subtotal, order.tax, order.total) == (10.0, 0.0, 10.0)
+    assert db.query(OrderItem).filter(OrderItem.order_id == order.id).count() == 1
+
+def test_create_order_skips_active_number(db, catalog):
+    # Still open from yesterday, so today's numbering starts on a taken number
+    add_order(db, OrderStatus.PREP, order_number=1)
+
+    order = _create(db)
+
+    assert order.order_number == 2
+    assert _create(db).order_number == 3
+
+def test_create_order_reraises_other_integrity_errors(db, catalog):
+    # A staff ID that does not exist violates the foreign key, not the number index
+    with pytest.raises(IntegrityError):
+        asyncio.run(create_order(
+            OrderCreate(items=[OrderItemData(item_id=ITEM_ID, quantity=1)]),
+            current_staff=SimpleNamespace(id=999999), db=db, entity_cache={}
+        ))
+
+def test_create_order_prices_and_stores_modifiers(db, catalog):
+    order = _create(db, quantity=2, mods=[MOD_ID])
+
+    line = db.query(OrderItem).filter(OrderItem.order_id == order.id).one()
+    assert (line.item_price, line.mods_price, line.total_price) == (5.0, 0.5, 11.0)
+    assert [(mod.mod_id, mod.mod_price, mod.mod_name) for mod in line.mods] == [(MOD_ID, 0.5, "Cheese")]
+    assert order.subtotal == 11.0
+
+def _update(db, order, **fields):
+    staff = db.get(Staff, STAFF_ID)
+    asyncio.run(update_order(order.id, OrderUpdate(**fields), current_staff=staff, db=db))
+    db.expire_all()
+    return db.get(Order, order.id)
+
+def test_tip_only_update_matches_full_recalculation(db, catalog):
+    db.add(CardFeeSettings(available=True, percentage_amount=0.05, min_fee=0.30))
+    order = _create(db, quantity=2)
+    order = _update(db, order, payment_method=PaymentMethod.CARD, tip_amount=1.0)
+    assert (order.card_fee, order.total) == (0.5, 11.5)
+
+    # Tip-only fast path
+    order = _update(db, order, tip_amount=3.0)
+    assert (order.tip_amount, order.total) == (3.0, 13.5)
+
+    # A full recalculation lands on the same total
+    order = _update(db, order, notes="No onions", tip_amount=3.0)
+    assert (order.notes, order.total) == ("No onions", 13.5)
+
+def test_add_item_appends_a_priced_line(db, catalog, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(print_queue, "enqueue", lambda job, *args: jobs.append(args))
+    order = _create(db)
+    jobs.clear()
+
+    item_data = OrderItemData(
+        item_id=ITEM_ID, quantity=2, mods=[ModifierData(mod_list_id=MOD_LIST_ID, mod_id=MOD_ID)]
+    )
+    staff = db.get(Staff, STAFF_ID)
+    asyncio.run(add_item(order.id, item_data, current_staff=staff, db=db, entity_cache={}))
+    db.expire_all()
+
+    order = db.get(Order, order.id)
+    line = order.items[-1]
+    assert (line.quantity, line.total_price, [mod.mod_name for mod in line.mods]) == (2, 11.0, ["Cheese"])
+    assert (order.subtotal, order.total) == (16.0, 16.0)
+    # The KDS gets the serialized lines, not ORM rows
+    [(order_number, items, staff_name)] = jobs
+    assert (order_number, len(items), staff_name) == (order.order_number, 2, staff.name)
+
+def test_update_order_rejects_orders_past_prep(db, catalog):
+    order = add_order(db, OrderStatus.READY, order_number=1)
+
+    with pytest.raises(HTTPException) as error:
+        _update(db, order, tip_amount=1.0)
+    assert error.value.status_code == 400
+
+def test_create_order_finds_free_number_past_active_block(db, catalog):
+    # Renumbered overnight: active orders hold 1..5, none was created today
+    for number in range(1, 6):
+        add_order(db, OrderStatus.PREP, order_number=number)
+
+    assert _create(db).order_number == 6
+    assert _create(db).order_number == 7
+
+def test_create_order_after_renumber_continues_numbering(db, catalog):
+    for number in (40, 12, 7, 3, 90):
+        add_order(db, OrderStatus.PREP, order_number=number)
+    assert daily_order_cleanup(db)
+    # Seeded from the renumbered orders, so the first create does not collide
+    assert order_validation._order_counter["last"] == 5
+
+    assert _create(db).order_number == 6
+
+def test_list_orders_returns_every_order_unless_limited(db, catalog):
+    for number in range(1, 4):
+        add_order(db, OrderStatus.DONE, order_number=number, age=timedelta(hours=number))
+    staff = db.get(Staff, STAFF_ID)
+
+    def listed(limit):
+        response = asyncio.run(list_orders(status=None, date=None, limit=limit, current_staff=staff, db=db))
+        return [order["order_number"] for order in json.loads(response.body)]
+
+    assert listed(None) == [1, 2, 3]
+    assert listed(2) == [1, 2]
@@ -0,0 +1,36 @@
+import importlib
+
+import pytest
+
+from config import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+@pytest.mark.parametrize("module", [
+    "models",
+    "app",
+    "routes.admin",
+    "routes.auth",
+    "routes.catalog",
+    "routes.order",
+    "routes.payment",
+    "routes.staff",
+    "routes.staff_time",
+    "routes.websocket",
+    "utils.order_management",
+    "utils.print_queue",
+    "utils.network",
+    "Printer.printer",
+])
+def test_module_imports(module):
+    importlib.import_module(module)
+
+def test_async_engine_uses_configured_pool():
+    from models.base import async_engine
+
+    assert async_engine.pool.size() == DB_POOL_SIZE
+    assert async_engine.pool._max_overflow == DB_MAX_OVERFLOW
+
+def test_async_engine_opens_the_sync_database():
+    from models.base import async_engine, engine
+
+    assert async_engine.url.drivername == "sqlite+aiosqlite"
+    assert async_engine.url.database == engine.url.database
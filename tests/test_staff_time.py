@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, Staff, StaffShift
+from models.base import set_sqlite_pragma
+from routes.staff_time import PinAuth, clock_in, clock_out, end_break, start_break
+from utils.auth import get_pin_hmac
+from tests.conftest import STAFF_ID
+
+PIN = PinAuth(pin="1234")
+
+async def _run(scenario):
+    """Run `scenario(db)` on a fresh in-memory async database with one staff member"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragma)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Shift IDs are six digits (check constraint)
+        await conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('staff_shifts', 100000)"))
+    session = sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)()
+    try:
+        session.add(Staff(id=STAFF_ID, name="Test", pin="1234", pin_hmac=get_pin_hmac("1234"), hourly_rate=15.0))
+        await session.commit()
+        return await scenario(session)
+    finally:
+        await session.close()
+        await engine.dispose()
+
+def test_shift_round_trip():
+    async def scenario(db):
+        shift_id = (await clock_in(PIN, db=db))["shift"]["shift_id"]
+        assert (await start_break(PIN, db=db))["shift"]["break_start"] is not None
+        assert (await end_break(PIN, db=db))["shift"]["break_end"] is not None
+        response = await clock_out(PIN, db=db)
+
+        db.expire_all()
+        staff = await db.get(Staff, STAFF_ID)
+        shift = await db.get(StaffShift, shift_id)
+        return response, staff, shift
+
+    response, staff, shift = asyncio.run(_run(scenario))
+    assert response["shift"]["shift_id"] == shift.id
+    assert response["shift"]["clock_out"] == shift.clock_out.isoformat()
+    assert not staff.is_working and not staff.is_on_break
+
+def test_clock_out_does_not_reload_the_shift():
+    async def scenario(db):
+        await clock_in(PIN, db=db)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.bind.sync_engine, "before_cursor_execute", listener)
+        await clock_out(PIN, db=db)
+        event.remove(db.bind.sync_engine, "before_cursor_execute", listener)
+        return statements
+
+    statements = asyncio.run(_run(scenario))
+    # Staff by PIN digest, the open shift, then both writes
+    assert [sql.split()[0] for sql in statements] == ["SELECT", "SELECT", "UPDATE", "UPDATE"]
+
+def test_break_without_shift_is_rejected():
+    async def scenario(db):
+        staff = await db.get(Staff, STAFF_ID)
+        staff.is_working = True
+        await db.commit()
+        with pytest.raises(HTTPException) as error:
+            await start_break(PIN, db=db)
+        return error.value.status_code
+
+    assert asyncio.run(_run(scenario)) == 404
@@ -1,10 +1,20 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, NamedTuple, Optional
+import anyio
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPBasic, HTTPBasicCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from models import Staff, get_db
 from config import SECRET_KEY
 
@@ -13,10 +23,73 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt only guards the stored PIN hashes (lookups go through the PIN cache /
+# pin_hmac), so a lower cost keeps the remaining verifies cheap
+pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10, deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 security = HTTPBasic()
 
+# Bounds concurrent PIN hashing threads; created lazily inside the event loop
+_hash_limiter: Optional[anyio.CapacityLimiter] = None
+
+# bcrypt is pure CPU, so legacy-hash scans fan out across processes (bypasses the GIL)
+_verify_pool: Optional[ProcessPoolExecutor] = None
+
+class CachedStaff(NamedTuple):
+    """The staff fields request authentication needs, served without a query"""
+    id: int
+    name: str
+    hourly_rate: float
+    isAdmin: bool
+    available: bool
+
+# PIN digest (pin_hmac) -> staff fields, loaded lazily and dropped whenever a
+# staff row is written
+_pin_cache: Optional[Dict[str, CachedStaff]] = None
+_pin_cache_lock = threading.Lock()
+
+_PIN_CACHE_QUERY = select(
+    Staff.pin_hmac, Staff.id, Staff.name, Staff.hourly_rate, Staff.isAdmin, Staff.available
+).where(Staff.pin_hmac.isnot(None))
+
+def refresh_pin_cache(db: Session) -> Dict[str, CachedStaff]:
+    """Reload the PIN digest -> staff map with a single Core query"""
+    global _pin_cache
+    rows = db.execute(_PIN_CACHE_QUERY).all()
+    with _pin_cache_lock:
+        _pin_cache = {digest: CachedStaff(*fields) for digest, *fields in rows}
+        return _pin_cache
+
+def invalidate_pin_cache(*args):
+    """Drop the PIN cache so the next lookup reloads it"""
+    global _pin_cache
+    with _pin_cache_lock:
+        _pin_cache = None
+
+# Columns held in the cache
+_CACHED_ATTRS = ("pin", "pin_hmac") + CachedStaff._fields[1:]
+
+def _invalidate_pin_cache_on_change(mapper, connection, target):
+    # Shift and break flips update staff rows all day; only cached columns matter
+    attrs = inspect(target).attrs
+    if any(getattr(attrs, name).history.has_changes() for name in _CACHED_ATTRS):
+        invalidate_pin_cache()
+
+event.listen(Staff, "after_insert", invalidate_pin_cache)
+event.listen(Staff, "after_update", _invalidate_pin_cache_on_change)
+event.listen(Staff, "after_delete", invalidate_pin_cache)
+
+def get_cached_staff(db: Session, pin: str) -> Optional[CachedStaff]:
+    """Staff fields for a PIN from the cache; only a (re)load touches the database"""
+    cache = _pin_cache
+    if cache is None:
+        cache = refresh_pin_cache(db)
+    return cache.get(get_pin_hmac(pin))
+
+def get_pin_hmac(pin: str) -> str:
+    """Keyed, deterministic PIN digest stored in Staff.pin_hmac for indexed lookups"""
+    return hmac.new(SECRET_KEY.encode(), pin.encode(), hashlib.sha256).hexdigest()
+
 def verify_pin(plain_pin: str, hashed_pin: str) -> bool:
     """Verify a PIN against its hash"""
     return pwd_context.verify(plain_pin, hashed_pin)
@@ -25,6 +98,52 @@ def get_pin_hash(pin: str) -> str:
     """Get hash of a PIN"""
     return pwd_context.hash(pin)
 
+def _get_hash_limiter() -> anyio.CapacityLimiter:
+    global _hash_limiter
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    return _hash_limiter
+
+async def get_pin_hash_async(pin: str) -> str:
+    """Hash a PIN on a worker thread so bcrypt does not block the event loop"""
+    return await anyio.to_thread.run_sync(get_pin_hash, pin, limiter=_get_hash_limiter())
+
+async def verify_pin_async(plain_pin: str, hashed_pin: str) -> bool:
+    """Verify a PIN on a worker thread so bcrypt does not block the event loop"""
+    return await anyio.to_thread.run_sync(verify_pin, plain_pin, hashed_pin, limiter=_get_hash_limiter())
+
+def _get_verify_pool() -> ProcessPoolExecutor:
+    global _verify_pool
+    if _verify_pool is None:
+        _verify_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _verify_pool
+
+async def _find_matching_pin(plain_pin: str, candidates: List[Staff]) -> Optional[Staff]:
+    """Verify a PIN against several bcrypt hashes in parallel, stopping at the first match"""
+    if not candidates:
+        return None
+    if len(candidates) == 1:
+        # A worker thread is enough for one verify; no process pool start-up
+        return candidates[0] if await verify_pin_async(plain_pin, candidates[0].pin) else None
+    
+    loop = asyncio.get_running_loop()
+    futures = {
+        loop.run_in_executor(_get_verify_pool(), verify_pin, plain_pin, s.pin): s
+        for s in candidates
+    }
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.result():
+                    return futures[future]
+    finally:
+        # Drop verifies that have not started yet
+        for future in pending:
+            future.cancel()
+    return None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -47,14 +166,16 @@ async def get_current_staff(
     """
     try:
         pin = credentials.username
-        if not pin.isdigit() or len(pin) != 4:
+        # ASCII only: str.isdigit() also accepts other Unicode digits
+        if len(pin) != 4 or not pin.isascii() or not pin.isdecimal():
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid PIN format. Must be 4 digits.",
                 headers={"WWW-Authenticate": "Basic"},
             )
         
-        staff = db.query(Staff).filter(Staff.pin == pin).first()
+        # Cached fields on a hit; the database only for PINs not cached yet
+        staff = get_cached_staff(db, pin) or await authenticate_staff(pin, db)
         if not staff:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,13 +200,54 @@ async def verify_admin(staff: Staff = Depends(get_current_staff)):
         )
     return staff
 
-def authenticate_staff(pin: str, db: Session) -> Optional[Staff]:
-    """Authenticate a staff member by PIN"""
-    staff = db.query(Staff).filter(Staff.active == True).all()
+# Rows still without a digest. The migration backfilled plain-text PINs, so
+# these hold bcrypt hashes written before pin_hmac existed.
+_LEGACY_STAFF_QUERY = select(Staff).where(Staff.pin_hmac.is_(None))
+
+def _hashed_pins(rows: List[Staff]) -> List[Staff]:
+    return [staff for staff in rows if pwd_context.identify(staff.pin)]
+
+def _backfill_statement(staff: Staff, digest: str):
+    return update(Staff).where(Staff.id == staff.id, Staff.pin_hmac.is_(None)).values(pin_hmac=digest)
+
+def _mark_backfilled(staff: Staff, digest: str) -> Staff:
+    # Mirror the committed digest onto the caller's instance without dirtying it
+    set_committed_value(staff, "pin_hmac", digest)
+    invalidate_pin_cache()
+    return staff
+
+async def authenticate_staff(pin: str, db: Session) -> Optional[Staff]:
+    """
+    Authenticate a staff member by PIN.
+    Availability is left to the caller, which reports it separately.
+    """
+    digest = get_pin_hmac(pin)
+    
+    # Single indexed lookup on the keyed digest instead of a bcrypt per row
+    staff = db.query(Staff).filter(Staff.pin_hmac == digest).first()
+    if staff:
+        return staff
     
-    # Check each staff member's PIN
-    for s in staff:
-        if verify_pin(pin, s.pin):
-            return s
+    # Legacy rows: verified off the event loop once, then backfilled in their
+    # own transaction so the caller's session is not committed here
+    staff = await _find_matching_pin(pin, _hashed_pins(db.execute(_LEGACY_STAFF_QUERY).scalars().all()))
+    if staff:
+        with db.get_bind().begin() as conn:
+            conn.execute(_backfill_statement(staff, digest))
+        _mark_backfilled(staff, digest)
+    return staff
+
+async def get_staff_by_pin_async(db: AsyncSession, pin: str) -> Optional[Staff]:
+    """Async variant of authenticate_staff, for routes that change the staff row"""
+    digest = get_pin_hmac(pin)
+    staff = (await db.execute(select(Staff).where(Staff.pin_hmac == digest))).scalars().first()
+    if staff:
+        return staff
     
-    return None
\ No newline at end of file
+    legacy = (await db.execute(_LEGACY_STAFF_QUERY)).scalars().all()
+    staff = await _find_matching_pin(pin, _hashed_pins(legacy))
+    if staff:
+        async with db.bind.begin() as conn:
+            await conn.execute(_backfill_statement(staff, digest))
+        _mark_backfilled(staff, digest)
+    return staff
@@ -1,11 +1,26 @@
+import asyncio
 import subprocess
 import logging
-from typing import Optional
+import socket
+from typing import List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import time
 
 logger = logging.getLogger(__name__)
 
+# Dedicated chain hooked into OUTPUT once; each toggle rewrites only this chain
+FIREWALL_CHAIN = "SQUARE_OUT"
+
+SQUARE_HEALTH_URL = "https://connect.squareup.com/health"
+SQUARE_CHECK_TTL = 5  # Seconds a health check result is reused
+SQUARE_DNS_TTL = 300  # Seconds resolved Square IPs are reused; the CDN rotates them
+INTERNET_GRACE_PERIOD = 2.0  # Seconds internet stays open after the last transaction
+
+# Shared keep-alive session so health checks skip the TCP/TLS handshake
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 class NetworkManager:
     def __init__(self):
         self.internet_enabled = False
@@ -14,70 +29,166 @@ class NetworkManager:
             "*.squareup.com",
             "*.squarecdn.com"
         ]
+        # (monotonic time, IPs) of the last Square endpoint resolution
+        self._square_ips: Optional[Tuple[float, List[str]]] = None
+        self._chain_hooked = False
+        # Serializes enable/disable so concurrent payments do not interleave toggles
+        self._firewall_lock = asyncio.Lock()
+        # Transactions currently using the internet window
+        self._refcount = 0
+        self._pending_disable: Optional[asyncio.TimerHandle] = None
+        # Task started by _pending_disable; the loop only keeps a weak reference
+        self._disable_task: Optional[asyncio.Task] = None
+        # (monotonic time, reachable) of the last Square health check
+        self._last_check: Optional[Tuple[float, bool]] = None
+    
+    def _resolve_square_ips(self) -> List[str]:
+        """Resolve the Square endpoints once per TTL; iptables would otherwise re-resolve per rule"""
+        if self._square_ips is not None:
+            resolved_at, ips = self._square_ips
+            if time.monotonic() - resolved_at < SQUARE_DNS_TTL:
+                return ips
+        
+        ips = set()
+        for endpoint in self._square_endpoints:
+            # Wildcards cannot be resolved (or matched) by iptables
+            if endpoint.startswith("*."):
+                continue
+            try:
+                for info in socket.getaddrinfo(endpoint, 443, socket.AF_INET, socket.SOCK_STREAM):
+                    ips.add(info[4][0])
+            except socket.gaierror as e:
+                logger.error(f"Failed to resolve {endpoint}: {e}")
+        
+        if not ips:
+            # Keep the last known addresses rather than opening no Square route
+            return self._square_ips[1] if self._square_ips else []
+        self._square_ips = (time.monotonic(), sorted(ips))
+        return self._square_ips[1]
+    
+    def _hook_chain(self):
+        """Create the chain and jump to it from OUTPUT (once per process)"""
+        if self._chain_hooked:
+            return
+        subprocess.run(
+            ['sudo', 'iptables', '-N', FIREWALL_CHAIN],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )  # Fails harmlessly if the chain already exists
+        hooked = subprocess.run(
+            ['sudo', 'iptables', '-C', 'OUTPUT', '-j', FIREWALL_CHAIN],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ).returncode == 0
+        if not hooked:
+            subprocess.run(['sudo', 'iptables', '-A', 'OUTPUT', '-j', FIREWALL_CHAIN], check=True)
+        self._chain_hooked = True
     
     def _modify_firewall(self, allow: bool):
         """Modify firewall rules to allow/block internet access"""
         try:
+            self._hook_chain()
+            
+            # Declaring the chain under --noflush flushes just that chain, so
+            # every toggle replaces its rules instead of growing OUTPUT
+            rules = [
+                "*filter",
+                f":{FIREWALL_CHAIN} - [0:0]",
+                f"-A {FIREWALL_CHAIN} -d 192.168.0.0/16 -j ACCEPT",  # Local network
+                f"-A {FIREWALL_CHAIN} -d 127.0.0.0/8 -j ACCEPT",     # Localhost
+            ]
             if allow:
                 # Allow access only to Square endpoints
-                for endpoint in self._square_endpoints:
-                    subprocess.run([
-                        'sudo', 'iptables', '-A', 'OUTPUT', 
-                        '-p', 'tcp', 
-                        '-d', endpoint, 
-                        '--dport', '443', 
-                        '-j', 'ACCEPT'
-                    ], check=True)
-            else:
-                # Block all outgoing internet traffic except local network
-                subprocess.run([
-                    'sudo', 'iptables', '-A', 'OUTPUT',
-                    '-d', '192.168.0.0/16',  # Local network
-                    '-j', 'ACCEPT'
-                ], check=True)
-                subprocess.run([
-                    'sudo', 'iptables', '-A', 'OUTPUT',
-                    '-d', '127.0.0.0/8',     # Localhost
-                    '-j', 'ACCEPT'
-                ], check=True)
-                subprocess.run([
-                    'sudo', 'iptables', '-A', 'OUTPUT',
-                    '-j', 'DROP'             # Drop all other traffic
-                ], check=True)
+                rules.extend(
+                    f"-A {FIREWALL_CHAIN} -p tcp -d {ip} --dport 443 -j ACCEPT"
+                    for ip in self._resolve_square_ips()
+                )
+            rules.append(f"-A {FIREWALL_CHAIN} -j DROP")  # Drop all other traffic
+            rules.append("COMMIT")
+            
+            # One fork/exec for the whole ruleset
+            subprocess.run(
+                ['sudo', 'iptables-restore', '--noflush'],
+                input="\n".join(rules) + "\n",
+                text=True,
+                check=True
+            )
             
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to modify firewall: {e}")
             return False
     
+    async def _modify_firewall_async(self, allow: bool) -> bool:
+        """Run the blocking iptables calls on a worker thread"""
+        return await asyncio.to_thread(self._modify_firewall, allow)
+    
     async def enable_internet(self) -> bool:
         """Enable internet access for Square transactions"""
-        if not self.internet_enabled:
-            if self._modify_firewall(True):
+        async with self._firewall_lock:
+            # A window that is still open (or in its grace period) is shared
+            if self._pending_disable is not None:
+                self._pending_disable.cancel()
+                self._pending_disable = None
+            
+            if not self.internet_enabled:
+                if not await self._modify_firewall_async(True):
+                    return False
                 self.internet_enabled = True
                 logger.info("Internet access enabled for Square transactions")
-                return True
-        return False
+            
+            self._refcount += 1
+            return True
     
     async def disable_internet(self) -> bool:
-        """Disable internet access after transaction"""
-        if self.internet_enabled:
-            if self._modify_firewall(False):
-                self.internet_enabled = False
-                logger.info("Internet access disabled")
-                return True
-        return False
+        """Release internet access after transaction"""
+        async with self._firewall_lock:
+            if self._refcount == 0:
+                return False
+            
+            self._refcount -= 1
+            if self._refcount == 0 and self.internet_enabled:
+                # Close the window after a grace period so back-to-back
+                # payments reuse it instead of toggling the firewall each time
+                self._pending_disable = asyncio.get_running_loop().call_later(
+                    INTERNET_GRACE_PERIOD,
+                    self._start_disable_task
+                )
+            return True
     
-    async def check_square_connection(self) -> bool:
-        """Check if Square endpoints are accessible"""
+    def _start_disable_task(self):
+        self._disable_task = asyncio.get_running_loop().create_task(self._disable_after_grace())
+        self._disable_task.add_done_callback(self._clear_disable_task)
+    
+    def _clear_disable_task(self, task: asyncio.Task):
+        if self._disable_task is task:
+            self._disable_task = None
+    
+    async def _disable_after_grace(self):
+        async with self._firewall_lock:
+            self._pending_disable = None
+            # A payment may have started while this task was waiting for the lock
+            if self._refcount == 0 and self.internet_enabled:
+                if await self._modify_firewall_async(False):
+                    self.internet_enabled = False
+                    logger.info("Internet access disabled")
+    
+    def _probe_square(self) -> bool:
         try:
-            response = requests.get(
-                "https://connect.squareup.com/health", 
-                timeout=5
-            )
+            response = _http_session.get(SQUARE_HEALTH_URL, timeout=5)
             return response.status_code == 200
-        except:
+        except requests.RequestException:
             return False
+    
+    async def check_square_connection(self) -> bool:
+        """Check if Square endpoints are accessible"""
+        # Repeated checks within the TTL reuse the last answer
+        if self._last_check is not None:
+            checked_at, reachable = self._last_check
+            if time.monotonic() - checked_at < SQUARE_CHECK_TTL:
+                return reachable
+        
+        reachable = await asyncio.to_thread(self._probe_square)
+        self._last_check = (time.monotonic(), reachable)
+        return reachable
 
 # Global network manager instance
 network_manager = NetworkManager() 
\ No newline at end of file
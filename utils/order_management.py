@@ -1,49 +1,144 @@
 from datetime import datetime, timedelta
+from typing import List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import Order, OrderHistory, OrderStatus
+from sqlalchemy import delete, select
+from sqlalchemy.orm import selectinload
+from models import Order, OrderHistory, OrderItem, OrderItemMod, OrderDiscount, OrderStatus, PendingReceipt
+from models.order import order_load_options
+from config import ARCHIVE_BATCH_SIZE
+from utils.order_validation import seed_order_counter
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _archive_batch(db: Session, cutoff_time: datetime, after_id: int) -> List[int]:
+    """Archive and delete the next batch of completed orders; returns their IDs"""
+    # Everything from_order() reads is loaded up front. Rows another
+    # transaction holds locked are skipped rather than waited on (ignored on
+    # SQLite, where the write lock is database-wide). Orders with a receipt
+    # still waiting to print are left for a later run: the receipt is printed
+    # from the order and its row references it.
+    completed_orders = db.query(Order).options(
+        selectinload(Order.staff),
+        *order_load_options()
+    ).filter(
+        Order.status.in_([
+            OrderStatus.DONE,
+            OrderStatus.VOID,
+            OrderStatus.REFUNDED,
+            OrderStatus.PARTIALLY_REFUNDED
+        ]),
+        Order.created_at < cutoff_time,
+        Order.id > after_id,
+        Order.id.notin_(select(PendingReceipt.order_id))
+    ).order_by(Order.id).limit(ARCHIVE_BATCH_SIZE).with_for_update(skip_locked=True).all()
+    
+    if not completed_orders:
+        return []
+    
+    # Create archive records in one executemany
+    db.bulk_insert_mappings(
+        OrderHistory,
+        [OrderHistory.values_from_order(order) for order in completed_orders]
+    )
+    
+    # Delete archived orders (children first; the ORM cascade is bypassed).
+    # The loaded rows are expunged below, so no session synchronization is needed
+    # (the default 'evaluate' mode cannot evaluate the item_ids subquery).
+    order_ids = [order.id for order in completed_orders]
+    item_ids = select(OrderItem.id).where(OrderItem.order_id.in_(order_ids))
+    no_sync = {"synchronize_session": False}
+    db.execute(delete(OrderItemMod).where(OrderItemMod.order_item_id.in_(item_ids)), execution_options=no_sync)
+    db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)), execution_options=no_sync)
+    db.execute(delete(OrderDiscount).where(OrderDiscount.order_id.in_(order_ids)), execution_options=no_sync)
+    db.execute(delete(Order).where(Order.id.in_(order_ids)), execution_options=no_sync)
+    
+    # The deleted rows are still in the identity map; drop them so memory
+    # stays bounded by the batch size
+    for order in completed_orders:
+        db.expunge(order)
+    
+    return order_ids
+
+def _archive_completed_orders(db: Session, commit_batches: bool = False) -> int:
+    """
+    Archive step, one bounded batch at a time (keyset-paginated on ID).
+    With commit_batches each batch is committed on its own so locks are held
+    briefly; otherwise everything stays in the caller's transaction.
+    """
+    cutoff_time = datetime.utcnow() - timedelta(hours=24)
+    archived_count = 0
+    after_id = 0
+    while True:
+        order_ids = _archive_batch(db, cutoff_time, after_id)
+        if not order_ids:
+            break
+        if commit_batches:
+            db.commit()
+        archived_count += len(order_ids)
+        after_id = order_ids[-1]
+    
+    return archived_count
+
+def _renumber_active_orders(db: Session) -> int:
+    """Renumber step without commit/rollback; returns the number of orders renumbered"""
+    # Get the IDs of all active orders, oldest first
+    active_filter = Order.status.in_([OrderStatus.PREP, OrderStatus.READY])
+    active_ids = db.query(Order.id).filter(active_filter).order_by(Order.created_at).all()
+    
+    # Park the current numbers out of range first: ux_order_active_number
+    # is checked per row, so renumbering in place could collide midway
+    db.query(Order).filter(active_filter).update(
+        {Order.order_number: -Order.id},
+        synchronize_session=False
+    )
+    
+    # Reset their order numbers starting from 1 in one executemany;
+    # updated_at is set explicitly to invalidate cached serializations
+    now = datetime.utcnow()
+    db.bulk_update_mappings(Order, [
+        {"id": order_id, "order_number": i, "updated_at": now}
+        for i, (order_id,) in enumerate(active_ids, 1)
+    ])
+    
+    return len(active_ids)
+
+def _archive_and_renumber(db: Session) -> Tuple[int, int]:
+    """
+    Archive completed orders and renumber active ones in a single transaction,
+    so no order can be created with a colliding number in between.
+    """
+    try:
+        archived_count = _archive_completed_orders(db)
+        reset_count = _renumber_active_orders(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    # Active orders now hold 1..reset_count; continue numbering after them
+    seed_order_counter(reset_count)
+    
+    logger.info(
+        "Order cleanup committed",
+        extra={"archived_count": archived_count, "reset_count": reset_count}
+    )
+    return archived_count, reset_count
+
 def reset_order_numbers(db: Session) -> bool:
     """
     Manually reset order numbers.
     Archives all completed orders before resetting.
     """
     try:
-        # Archive all completed orders first
-        archive_completed_orders(db)
-        
-        # Get all active orders
-        active_orders = db.query(Order).filter(
-            Order.status.in_([OrderStatus.PREP, OrderStatus.READY])
-        ).order_by(Order.created_at).all()
-        
-        # Reset their order numbers starting from 1
-        for i, order in enumerate(active_orders, 1):
-            order.order_number = i
-        
-        db.commit()
+        _archive_and_renumber(db)
         logger.info("Order numbers reset successfully")
         return True
-        
+    
     except Exception as e:
-        db.rollback()
         logger.error(f"Failed to reset order numbers: {e}")
         return False
 
-def validate_order_number(db: Session, order_number: int) -> bool:
-    """
-    Validate that an order number is not already in use for active orders.
-    """
-    existing_order = db.query(Order).filter(
-        Order.order_number == order_number,
-        Order.status.in_([OrderStatus.PREP, OrderStatus.READY])
-    ).first()
-    
-    return existing_order is None
-
 def archive_completed_orders(db: Session) -> int:
     """
     Archive orders that are completed (DONE, VOID, REFUNDED, PARTIALLY_REFUNDED)
@@ -51,35 +146,12 @@ def archive_completed_orders(db: Session) -> int:
     Returns the number of orders archived.
     """
     try:
-        # Get orders to archive
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        completed_orders = db.query(Order).filter(
-            Order.status.in_([
-                OrderStatus.DONE,
-                OrderStatus.VOID,
-                OrderStatus.REFUNDED,
-                OrderStatus.PARTIALLY_REFUNDED
-            ]),
-            Order.created_at < cutoff_time
-        ).all()
-        
-        # Create archive records
-        archived_count = 0
-        for order in completed_orders:
-            archive = OrderHistory.from_order(order)
-            db.add(archive)
-            archived_count += 1
-        
-        # Delete archived orders from main table
+        archived_count = _archive_completed_orders(db, commit_batches=True)
+        db.commit()
         if archived_count > 0:
-            for order in completed_orders:
-                db.delete(order)
-            
-            db.commit()
             logger.info(f"Archived {archived_count} completed orders")
-        
         return archived_count
-        
+    
     except Exception as e:
         db.rollback()
         logger.error(f"Failed to archive orders: {e}")
@@ -90,17 +162,18 @@ def daily_order_cleanup(db: Session) -> bool:
     Perform daily order cleanup:
     1. Archive completed orders
     2. Reset order numbers for active orders
+    Both steps share one transaction: the cleanup is all-or-nothing.
+    Pass a dedicated, short-lived session (as main.run_daily_cleanup does) so
+    the sweep does not hold a pooled connection that requests are waiting on.
     """
     try:
-        # Archive old orders first
-        archive_completed_orders(db)
-        
-        # Reset order numbers for remaining active orders
-        reset_order_numbers(db)
-        
-        logger.info("Daily order cleanup completed successfully")
+        archived_count, reset_count = _archive_and_renumber(db)
+        logger.info(
+            f"Daily order cleanup completed successfully "
+            f"(archived {archived_count}, renumbered {reset_count})"
+        )
         return True
-        
+    
     except Exception as e:
         logger.error(f"Failed to perform daily order cleanup: {e}")
-        return False 
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -1,58 +1,172 @@
-from typing import Optional
-from sqlalchemy.orm import Session
-from models import Order, OrderItem, Item, Discount, CardFee
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import bindparam, event, func, inspect, lambda_stmt, select
+from sqlalchemy.orm import Session, selectinload
+from models import Order, OrderItem, OrderStatus, Item, ModList, Discount, CardFeeSettings
 from datetime import datetime
+import threading
+import time
+
+# Seconds a discount / card fee lookup is reused
+PRICING_CACHE_TTL = 60
+
+# id -> (monotonic time, plain values or None); never ORM instances, so the
+# entries are safe to share across sessions
+_discount_cache: Dict[int, Tuple[float, Optional[Tuple[float, bool]]]] = {}
+_card_fee_cache: Dict[int, Tuple[float, Optional[Tuple[float, float]]]] = {}
+
+def invalidate_pricing_cache(*args):
+    """Drop cached discounts and card fees so the next lookup reloads them"""
+    _discount_cache.clear()
+    _card_fee_cache.clear()
+
+for _model in (Discount, CardFeeSettings):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, invalidate_pricing_cache)
+
+def _get_cached(cache: dict, key: int, load):
+    entry = cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < PRICING_CACHE_TTL:
+        return entry[1]
+    value = load()
+    cache[key] = (time.monotonic(), value)
+    return value
+
+def _get_discount(db: Session, discount_id: int) -> Optional[Tuple[float, bool]]:
+    """(amount, is_percentage) of an available discount, or None"""
+    def load():
+        # lambda_stmt: the statement is built and compiled once; discount_id
+        # is picked up from the closure as a bound parameter on each call
+        row = db.execute(lambda_stmt(lambda: select(Discount.amount, Discount.is_percentage).where(
+            Discount.id == discount_id,
+            Discount.available == True
+        ))).first()
+        return (row.amount, row.is_percentage) if row else None
+    return _get_cached(_discount_cache, discount_id, load)
+
+def _get_card_fee(db: Session, card_fee_id: int) -> Optional[Tuple[float, float]]:
+    """(percentage_amount, min_fee) of available card fee settings, or None"""
+    def load():
+        row = db.execute(lambda_stmt(lambda: select(CardFeeSettings.percentage_amount, CardFeeSettings.min_fee).where(
+            CardFeeSettings.id == card_fee_id,
+            CardFeeSettings.available == True
+        ))).first()
+        return (row.percentage_amount, row.min_fee) if row else None
+    return _get_cached(_card_fee_cache, card_fee_id, load)
+
+MAX_ORDER_NUMBER = 99
+
+def next_order_number_after(order_number: int) -> int:
+    """The number following order_number, wrapping from 99 back to 1"""
+    return 1 if order_number >= MAX_ORDER_NUMBER else order_number + 1
+
+# Last order number handed out today, so only the first order of the day
+# (or of the process) queries for it. Multiple workers each keep their own;
+# ux_order_active_number and create_order's retry keep them consistent.
+_order_counter = {"date": None, "last": 0}
+_order_counter_lock = threading.Lock()
+
+def _latest_order_number(db: Session, today_start: datetime) -> int:
+    # Get the number of the most recent order created today. The most recent
+    # (not the highest) number is needed so numbering wraps from 99 to 1.
+    # ix_orders_created_at_order_number answers this from the index alone,
+    # including when no order exists today yet (the old primary key walk
+    # scanned every older row in that case).
+    last_number = db.execute(lambda_stmt(lambda: select(Order.order_number).where(
+        Order.created_at >= today_start
+    ).order_by(Order.created_at.desc()).limit(1))).scalar()
+    return last_number or 0
 
 def get_next_order_number(db: Session) -> int:
     """Get the next available order number (1-99)"""
-    # Get the last order number used today
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    last_order = db.query(Order).filter(
-        Order.created_at >= today_start
-    ).order_by(Order.order_number.desc()).first()
-    
-    if not last_order:
-        return 1
+    with _order_counter_lock:
+        if _order_counter["date"] != today_start:
+            _order_counter["last"] = _latest_order_number(db, today_start)
+            _order_counter["date"] = today_start
+        
+        last_number = _order_counter["last"]
+        next_number = next_order_number_after(last_number) if last_number else 1
+        _order_counter["last"] = next_number
+        return next_number
+
+def record_order_number(order_number: int) -> None:
+    """Note the number actually used when create_order had to skip ahead"""
+    with _order_counter_lock:
+        _order_counter["last"] = order_number
+
+# Numbers held by active orders (ux_order_active_number's rows)
+_active_numbers_stmt = select(Order.order_number).where(
+    Order.status.in_([OrderStatus.PREP, OrderStatus.READY])
+)
+
+def next_free_order_number(db: Session, order_number: int) -> Optional[int]:
+    """
+    First number after order_number (wrapping) that no active order holds,
+    or None when all of them are taken. One query for the active numbers.
+    """
+    taken = set(db.execute(_active_numbers_stmt).scalars())
+    candidate = order_number
+    for _ in range(MAX_ORDER_NUMBER):
+        candidate = next_order_number_after(candidate)
+        if candidate not in taken:
+            return candidate
+    return None
+
+def seed_order_counter(last_number: int) -> None:
+    """Continue today's numbering after last_number (the highest active number after renumbering)"""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    with _order_counter_lock:
+        _order_counter["date"] = today_start
+        _order_counter["last"] = last_number
+
+def reset_order_counter() -> None:
+    """Forget the cached counter (after renumbering) so it is reloaded"""
+    with _order_counter_lock:
+        _order_counter["date"] = None
+
+# Line totals summed in the database; compiled once and reused
+_subtotal_stmt = select(
+    func.coalesce(func.sum(OrderItem.total_price), 0.0)
+).where(OrderItem.order_id == bindparam("order_id"))
+
+def _order_subtotal(db: Session, order: Order) -> float:
+    """Subtotal from the loaded items when possible, otherwise one SQL aggregate"""
+    # Routes add/remove lines through order.items, so a loaded collection is current
+    if "items" not in inspect(order).unloaded:
+        line_totals = [item.total_price for item in order.items]
+        if None not in line_totals:
+            return sum(line_totals, 0.0)
     
-    next_number = last_order.order_number + 1
-    return 1 if next_number > 99 else next_number
+    # Flush first so lines added/removed in this session are included
+    db.flush()
+    return db.execute(_subtotal_stmt, {"order_id": order.id}).scalar()
 
-def calculate_order_totals(
-    db: Session,
-    order: Order,
-    discount_id: Optional[int] = None,
-    card_fee_id: Optional[int] = None,
-    tip_amount: float = 0.0
+def _apply_pricing(
+    subtotal: float,
+    discount: Optional[Tuple[float, bool]],
+    card_fee: Optional[Tuple[float, float]],
+    tip_amount: float
 ) -> dict:
-    """Calculate order totals including subtotal, discount, card fee, and final total"""
-    # Calculate subtotal from items
-    subtotal = sum(item.calculate_subtotal() for item in order.items)
-    
+    """Totals for a subtotal given cached discount / card fee values"""
     # Apply discount if any
     discount_amount = 0.0
-    if discount_id:
-        discount = db.query(Discount).filter(
-            Discount.id == discount_id,
-            Discount.active == True
-        ).first()
-        if discount:
-            if discount.discount_type == "percentage":
-                discount_amount = subtotal * (discount.amount / 100)
-            else:  # flat amount
-                discount_amount = discount.amount
+    if discount:
+        amount, is_percentage = discount
+        if is_percentage:
+            discount_amount = subtotal * (amount / 100)
+        else:  # flat amount (stored negative)
+            discount_amount = abs(amount)
     
     # Calculate total after discount
     total_after_discount = subtotal - discount_amount
     
     # Apply card fee if any
     card_fee_amount = 0.0
-    if card_fee_id:
-        card_fee = db.query(CardFee).filter(
-            CardFee.id == card_fee_id,
-            CardFee.active == True
-        ).first()
-        if card_fee:
-            card_fee_amount = (total_after_discount * (card_fee.percentage / 100)) + card_fee.flat_amount
+    if card_fee:
+        percentage_amount, min_fee = card_fee
+        # Percentage or minimum, whichever is higher (as Order.calculate_card_fee)
+        card_fee_amount = max(total_after_discount * percentage_amount, min_fee)
     
     # Calculate final total
     final_total = total_after_discount + card_fee_amount + tip_amount
@@ -66,14 +180,63 @@ def calculate_order_totals(
         "total": final_total
     }
 
-def validate_order_items(db: Session, items_data: list) -> None:
-    """Validate order items and their modifiers"""
+def calculate_order_totals(
+    db: Session,
+    order: Order,
+    discount_id: Optional[int] = None,
+    card_fee_id: Optional[int] = None,
+    tip_amount: float = 0.0
+) -> dict:
+    """Calculate order totals including subtotal, discount, card fee, and final total"""
+    return _apply_pricing(
+        _order_subtotal(db, order),
+        _get_discount(db, discount_id) if discount_id else None,
+        _get_card_fee(db, card_fee_id) if card_fee_id else None,
+        tip_amount
+    )
+
+def get_entity_cache(request: Request) -> dict:
+    """Per-request cache of looked-up entities, keyed by (model name, id)"""
+    if not hasattr(request.state, "entity_cache"):
+        request.state.entity_cache = {}
+    return request.state.entity_cache
+
+def validate_order_items(db: Session, items_data: list, cache: Optional[dict] = None) -> dict:
+    """
+    Validate order items and their modifiers.
+    Returns the validated items keyed by ID so callers can reuse them.
+    Items already in the request's entity cache are not queried again.
+    """
+    if cache is None:
+        cache = {}
+    item_ids = {item_data["item_id"] for item_data in items_data}
+    
+    # Fetch every item not already cached in a single IN query, with its
+    # modifier lists and their mods loaded by two more IN queries
+    missing_ids = {item_id for item_id in item_ids if ("Item", item_id) not in cache}
+    if missing_ids:
+        found = {
+            item.id: item
+            for item in db.query(Item).options(
+                selectinload(Item.mod_lists).selectinload(ModList.mods)
+            ).filter(
+                Item.id.in_(missing_ids),
+                Item.available == True
+            ).all()
+        }
+        for item_id in missing_ids:
+            # Misses are cached too so a repeated unknown ID is not re-queried
+            cache[("Item", item_id)] = found.get(item_id)
+    
+    items_by_id = {
+        item_id: cache[("Item", item_id)]
+        for item_id in item_ids
+        if cache[("Item", item_id)] is not None
+    }
+    
     for item_data in items_data:
         # Check if item exists and is active
-        item = db.query(Item).filter(
-            Item.id == item_data["item_id"],
-            Item.active == True
-        ).first()
+        item = items_by_id.get(item_data["item_id"])
         if not item:
             raise ValueError(f"Item {item_data['item_id']} not found or inactive")
         
@@ -84,6 +247,8 @@ def validate_order_items(db: Session, items_data: list) -> None:
         # Validate modifiers if any
         if "modifiers" in item_data:
             mod_lists = {ml.id: ml for ml in item.mod_lists}
+            # Built lazily, once per mod list, for O(1) membership checks
+            valid_mod_ids = {}
             
             # Track selections per mod list
             selections = {}
@@ -97,8 +262,9 @@ def validate_order_items(db: Session, items_data: list) -> None:
                 selections[mod_list.id] = selections.get(mod_list.id, 0) + 1
                 
                 # Validate modifier exists in the list
-                valid_mod = any(m.id == mod["mod_id"] for m in mod_list.mods)
-                if not valid_mod:
+                if mod_list.id not in valid_mod_ids:
+                    valid_mod_ids[mod_list.id] = {m.id for m in mod_list.mods}
+                if mod["mod_id"] not in valid_mod_ids[mod_list.id]:
                     raise ValueError(f"Invalid modifier {mod['mod_id']} for list {mod_list.id}")
             
             # Check min/max selections for each mod list
@@ -114,6 +280,8 @@ def validate_order_items(db: Session, items_data: list) -> None:
                         f"Item {item.name} allows at most {mod_list.max_selections} "
                         f"selections from {mod_list.name}"
                     )
+    
+    return items_by_id
 
 def validate_payment(
     payment_method: str,
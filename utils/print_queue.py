@@ -0,0 +1,83 @@
+from typing import Callable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PrintQueue:
+    """
+    Dispatches printer and KDS jobs from a dedicated worker task.
+
+    Printer/KDS calls are blocking socket I/O, so the worker runs each job
+    in the default thread pool. Request handlers only enqueue and return.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the worker task (call from within the running event loop)"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+            logger.info("Print queue worker started")
+
+    async def stop(self):
+        """Stop the worker task, dropping any jobs still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+            logger.info("Print queue worker stopped")
+
+    def enqueue(self, job: Callable, *args):
+        """Queue a blocking printer/KDS call to run on the worker"""
+        if self._queue is None:
+            logger.error(f"Print queue not running, dropping job {job.__name__}")
+            return
+        self._queue.put_nowait((job, args))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, args = await self._queue.get()
+            try:
+                await loop.run_in_executor(None, job, *args)
+            except Exception as e:
+                logger.error(f"Print job {job.__name__} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def enqueue_receipt(self, db, order_id: int, amount_tendered: Optional[float] = None, change: Optional[float] = None):
+        """
+        Persist a pending receipt and queue it for printing.
+        The row is committed before the job is queued so the worker can see it,
+        and it survives a restart until the printer has accepted the receipt.
+        """
+        # Imported here so the queue itself stays independent of the models
+        from Printer.printer import print_pending_receipt
+        from models.system import PendingReceipt
+        
+        pending = PendingReceipt(order_id=order_id, amount_tendered=amount_tendered, change=change)
+        db.add(pending)
+        db.commit()
+        self.enqueue(print_pending_receipt, pending.id)
+
+    def requeue_pending_receipts(self, db):
+        """Queue receipts left unprinted by a previous run"""
+        from Printer.printer import print_pending_receipt
+        from models.system import PendingReceipt
+        
+        pending_ids = [row.id for row in db.query(PendingReceipt.id).order_by(PendingReceipt.id)]
+        for pending_id in pending_ids:
+            self.enqueue(print_pending_receipt, pending_id)
+        if pending_ids:
+            logger.info(f"Requeued {len(pending_ids)} pending receipts")
+
+# Create global print queue instance
+print_queue = PrintQueue()
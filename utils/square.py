@@ -1,32 +1,56 @@
 from typing import Optional
-from square.client import Client
-from square.http.api_response import ApiResponse
+from decimal import Decimal, ROUND_HALF_EVEN
+import httpx
 import logging
 from config import SQUARE_ACCESS_TOKEN, SQUARE_ENVIRONMENT
-import uuid
+import secrets
 
 logger = logging.getLogger(__name__)
 
-# Initialize Square client
-square_client = Client(
-    access_token=SQUARE_ACCESS_TOKEN,
-    environment=SQUARE_ENVIRONMENT
+SQUARE_BASE_URLS = {
+    "production": "https://connect.squareup.com",
+    "sandbox": "https://connect.squareupsandbox.com"
+}
+SQUARE_API_VERSION = "2022-01-20"
+
+# One pooled, keep-alive HTTP/2 client for all Square calls, so payments do
+# not block the event loop or pay for a TCP/TLS handshake each time
+_client = httpx.AsyncClient(
+    base_url=SQUARE_BASE_URLS.get(SQUARE_ENVIRONMENT, SQUARE_BASE_URLS["sandbox"]),
+    headers={
+        "Authorization": f"Bearer {SQUARE_ACCESS_TOKEN}",
+        "Square-Version": SQUARE_API_VERSION,
+        "Content-Type": "application/json"
+    },
+    http2=True,
+    timeout=10
 )
 
+async def close_client():
+    """Close the shared Square HTTP client (call on shutdown)"""
+    await _client.aclose()
+
 def format_money_amount(amount: float) -> int:
     """Convert dollar amount to cents for Square API"""
-    return int(amount * 100)
+    # Via Decimal so float error cannot truncate a cent away (19.99 -> 1998)
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
 
-def check_connection() -> bool:
+async def check_connection() -> bool:
     """Test Square API connection"""
     try:
-        response = square_client.locations.list_locations()
-        return response.is_success()
+        response = await _client.get("/v2/locations")
+        return response.is_success
     except Exception as e:
         logger.error(f"Square connection test failed: {str(e)}")
         return False
 
-def process_card_payment(amount: float, source_id: str, location_id: str) -> dict:
+async def process_card_payment(
+    amount: float,
+    source_id: str,
+    location_id: Optional[str] = None,
+    reference_id: Optional[str] = None,
+    note: Optional[str] = None
+) -> dict:
     """Process a card payment"""
     try:
         body = {
@@ -35,21 +59,28 @@ def process_card_payment(amount: float, source_id: str, location_id: str) -> dic
                 "amount": format_money_amount(amount),
                 "currency": "USD"
             },
-            "idempotency_key": str(uuid.uuid4())
+            "idempotency_key": secrets.token_hex(16)
         }
-        
-        response = square_client.payments.create_payment(body)
-        if response.is_success():
+        if location_id:
+            body["location_id"] = location_id
+        if reference_id:
+            body["reference_id"] = reference_id
+        if note:
+            body["note"] = note
+
+        response = await _client.post("/v2/payments", json=body)
+        data = response.json()
+        if response.is_success:
             return {
                 "success": True,
-                "payment_id": response.body["payment"]["id"],
-                "status": response.body["payment"]["status"]
+                "payment_id": data["payment"]["id"],
+                "status": data["payment"]["status"]
             }
         else:
-            logger.error(f"Payment failed: {response.errors}")
+            logger.error(f"Payment failed: {data.get('errors')}")
             return {
                 "success": False,
-                "error": response.errors
+                "error": data.get("errors")
             }
     except Exception as e:
         logger.error(f"Payment processing error: {str(e)}")
@@ -58,32 +89,33 @@ def process_card_payment(amount: float, source_id: str, location_id: str) -> dic
             "error": str(e)
         }
 
-def process_refund(payment_id: str, amount: Optional[float] = None) -> dict:
+async def process_refund(payment_id: str, amount: Optional[float] = None) -> dict:
     """Process a refund for a payment"""
     try:
         body = {
-            "idempotency_key": str(uuid.uuid4()),
+            "idempotency_key": secrets.token_hex(16),
             "payment_id": payment_id
         }
-        
+
         if amount:
             body["amount_money"] = {
                 "amount": format_money_amount(amount),
                 "currency": "USD"
             }
-            
-        response = square_client.refunds.refund_payment(body)
-        if response.is_success():
+
+        response = await _client.post("/v2/refunds", json=body)
+        data = response.json()
+        if response.is_success:
             return {
                 "success": True,
-                "refund_id": response.body["refund"]["id"],
-                "status": response.body["refund"]["status"]
+                "refund_id": data["refund"]["id"],
+                "status": data["refund"]["status"]
             }
         else:
-            logger.error(f"Refund failed: {response.errors}")
+            logger.error(f"Refund failed: {data.get('errors')}")
             return {
                 "success": False,
-                "error": response.errors
+                "error": data.get("errors")
             }
     except Exception as e:
         logger.error(f"Refund processing error: {str(e)}")
@@ -92,24 +124,25 @@ def process_refund(payment_id: str, amount: Optional[float] = None) -> dict:
             "error": str(e)
         }
 
-def get_payment_status(payment_id: str) -> dict:
+async def get_payment_status(payment_id: str) -> dict:
     """Get the status of a payment"""
     try:
-        response = square_client.payments.get_payment(payment_id)
-        if response.is_success():
+        response = await _client.get(f"/v2/payments/{payment_id}")
+        data = response.json()
+        if response.is_success:
             return {
                 "success": True,
-                "status": response.body["payment"]["status"]
+                "status": data["payment"]["status"]
             }
         else:
-            logger.error(f"Get payment status failed: {response.errors}")
+            logger.error(f"Get payment status failed: {data.get('errors')}")
             return {
                 "success": False,
-                "error": response.errors
+                "error": data.get("errors")
             }
     except Exception as e:
         logger.error(f"Get payment status error: {str(e)}")
         return {
             "success": False,
             "error": str(e)
-        } 
\ No newline at end of file
+        }
@@ -1,9 +1,10 @@
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set, Tuple, Union
 from fastapi import WebSocket
-import json
+import orjson
 import logging
 import asyncio
 from enum import Enum
+from utils.order_validation import invalidate_pricing_cache
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,9 @@ class ConnectionManager:
         
         # Store active orders being viewed by each display
         self.active_orders: Dict[str, Set[int]] = {}
+        
+        # Reverse index: order ID -> clients viewing it
+        self.order_watchers: Dict[int, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket, client_type: ClientType, client_id: str):
         """Connect a new client"""
@@ -36,103 +40,138 @@ class ConnectionManager:
         if client_id in self.connections[client_type]:
             del self.connections[client_type][client_id]
         if client_id in self.active_orders:
-            del self.active_orders[client_id]
+            for order_id in self.active_orders.pop(client_id):
+                self._unwatch(client_id, order_id)
         logger.info(f"{client_type} disconnected: {client_id}")
     
     def add_active_order(self, client_id: str, order_id: int):
         """Add an order to a client's active orders"""
         if client_id in self.active_orders:
             self.active_orders[client_id].add(order_id)
+            self.order_watchers.setdefault(order_id, set()).add(client_id)
     
     def remove_active_order(self, client_id: str, order_id: int):
         """Remove an order from a client's active orders"""
         if client_id in self.active_orders:
             self.active_orders[client_id].discard(order_id)
+            self._unwatch(client_id, order_id)
+    
+    def _unwatch(self, client_id: str, order_id: int):
+        """Drop a client from an order's watchers, removing empty entries"""
+        watchers = self.order_watchers.get(order_id)
+        if watchers is not None:
+            watchers.discard(client_id)
+            if not watchers:
+                del self.order_watchers[order_id]
+    
+    @staticmethod
+    def _encode(message: dict) -> str:
+        """
+        Encode a message with orjson. Naive datetimes are marked as UTC, and
+        anything else orjson cannot handle falls back to str(). Sent as text
+        frames, which existing clients expect.
+        """
+        return orjson.dumps(message, default=str, option=orjson.OPT_NAIVE_UTC).decode()
+    
+    def _type_targets(self, client_type: ClientType) -> List[Tuple[ClientType, str, WebSocket]]:
+        """Every connected client of one type, as _send_payload targets"""
+        return [
+            (client_type, client_id, connection)
+            for client_id, connection in self.connections[client_type].items()
+        ]
+    
+    def _watcher_targets(self, order_id: int) -> List[Tuple[ClientType, str, WebSocket]]:
+        """Customer displays viewing an order, straight from the reverse index"""
+        displays = self.connections[ClientType.CUSTOMER_DISPLAY]
+        return [
+            (ClientType.CUSTOMER_DISPLAY, client_id, displays[client_id])
+            for client_id in self.order_watchers.get(order_id, ())
+            if client_id in displays
+        ]
     
     async def broadcast_to_type(self, client_type: ClientType, message: dict):
         """Broadcast message to all clients of a specific type"""
-        disconnected = []
-        for client_id, connection in self.connections[client_type].items():
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending to {client_type} {client_id}: {e}")
-                disconnected.append((client_type, client_id))
-        
-        # Clean up disconnected clients
-        for client_type, client_id in disconnected:
-            self.disconnect(client_type, client_id)
+        # Encode once and send the same text frame to every client
+        payload = self._encode(message)
+        await self._send_payload(self._type_targets(client_type), payload)
     
     async def send_to_client(self, client_type: ClientType, client_id: str, message: dict):
         """Send message to a specific client"""
         if client_id in self.connections[client_type]:
             try:
-                await self.connections[client_type][client_id].send_json(message)
+                await self.connections[client_type][client_id].send_text(self._encode(message))
             except Exception as e:
                 logger.error(f"Error sending to {client_type} {client_id}: {e}")
                 self.disconnect(client_type, client_id)
     
-    async def broadcast_order_update(self, order_data: dict):
-        """Broadcast order updates to relevant clients"""
-        order_id = order_data["id"]
+    async def _send_payload(self, targets: List[Tuple[ClientType, str, WebSocket]], payload: str):
+        """Send a pre-encoded JSON message to several clients concurrently"""
+        if not targets:
+            return
         
-        # Send to all POS clients
-        await self.broadcast_to_type(ClientType.POS, {
-            "type": "order_update",
-            "data": order_data
-        })
+        # One slow client no longer holds up the others; failures come back as results
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for _, _, connection in targets),
+            return_exceptions=True
+        )
         
-        # Send to customer displays viewing this order
-        for client_id, orders in self.active_orders.items():
-            if order_id in orders:
-                await self.send_to_client(
-                    ClientType.CUSTOMER_DISPLAY,
-                    client_id,
-                    {
-                        "type": "order_update",
-                        "data": order_data
-                    }
-                )
+        # Clean up disconnected clients
+        for (client_type, client_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending to {client_type} {client_id}: {result}")
+                self.disconnect(client_type, client_id)
+    
+    async def broadcast_order_update(self, order_data: Union[dict, int], status: Optional[str] = None):
+        """
+        Broadcast order updates to relevant clients.
+        Accepts either a serialized order or an order ID plus its new status.
+        """
+        if isinstance(order_data, dict):
+            order_id = order_data.get("order_id", order_data.get("id"))
+        else:
+            order_id = order_data
+            order_data = {"order_id": order_id, "status": status}
+        
+        # Encode once and reuse the same text frame for every client
+        payload = self._encode({"type": "order_update", "data": order_data})
+        
+        # All POS clients
+        targets = self._type_targets(ClientType.POS)
         
-        # Send to kitchen displays if order is open
+        # Customer displays viewing this order
+        targets.extend(self._watcher_targets(order_id))
+        
+        # Kitchen displays if order is open
         if order_data.get("status") == "open":
-            await self.broadcast_to_type(ClientType.KITCHEN_DISPLAY, {
-                "type": "order_update",
-                "data": order_data
-            })
+            targets.extend(self._type_targets(ClientType.KITCHEN_DISPLAY))
+        
+        await self._send_payload(targets, payload)
     
     async def broadcast_payment_update(self, payment_data: dict):
         """Broadcast payment status updates"""
         order_id = payment_data.get("order_id")
+        payload = self._encode({"type": "payment_update", "data": payment_data})
         
         # Send to POS clients
-        await self.broadcast_to_type(ClientType.POS, {
-            "type": "payment_update",
-            "data": payment_data
-        })
+        targets = self._type_targets(ClientType.POS)
         
         # Send to customer displays viewing this order
         if order_id:
-            for client_id, orders in self.active_orders.items():
-                if order_id in orders:
-                    await self.send_to_client(
-                        ClientType.CUSTOMER_DISPLAY,
-                        client_id,
-                        {
-                            "type": "payment_update",
-                            "data": payment_data
-                        }
-                    )
+            targets.extend(self._watcher_targets(order_id))
+        
+        await self._send_payload(targets, payload)
     
     async def broadcast_catalog_update(self, update_data: dict):
         """Broadcast catalog updates (items, categories, etc.)"""
+        # Pricing may have changed; drop cached discounts / card fees
+        invalidate_pricing_cache()
+        
         # Send to all POS and customer display clients
-        message = {
-            "type": "catalog_update",
-            "data": update_data
-        }
-        await self.broadcast_to_type(ClientType.POS, message)
-        await self.broadcast_to_type(ClientType.CUSTOMER_DISPLAY, message)
+        payload = self._encode({"type": "catalog_update", "data": update_data})
+        await self._send_payload(
+            self._type_targets(ClientType.POS) + self._type_targets(ClientType.CUSTOMER_DISPLAY),
+            payload
+        )
 
 # Create global connection manager instance
 manager = ConnectionManager() 
\ No newline at end of file